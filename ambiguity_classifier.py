@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import numpy as np
+
+from detect_ambiguity import detect_ambiguity
+from detect_duplicates import EMBEDDING_CACHE, load_embedding_cache, normalize, text_hash
+
+# ==============================
+# SETTINGS
+# ==============================
+MODEL_FILE = "ambiguity_classifier.npz"
+LABELS_FILE = "ambiguity_labels.json"
+
+# One feature per rule family, counted from detect_ambiguity flags
+FLAG_CATEGORIES = [
+    "weak_modal",
+    "vague_word",
+    "time_expression",
+    "quantity_expression",
+    "missing_measurement",
+    "multiple_actions",
+    "vague_verb",
+    "too_short",
+]
+
+LEARNED_THRESHOLD = 0.5
+
+EPOCHS = 2000
+LEARNING_RATE = 0.1
+L2_PENALTY = 1e-3
+HOLDOUT_FRACTION = 0.2
+SEED = 42
+
+
+# ==============================
+# FEATURES
+# ==============================
+def flag_features(flag_lists):
+    features = np.zeros((len(flag_lists), len(FLAG_CATEGORIES)), dtype=np.float32)
+
+    for row, flags in enumerate(flag_lists):
+        for flag in flags:
+            category = flag.split(":", 1)[0]
+            if category in FLAG_CATEGORIES:
+                features[row, FLAG_CATEGORIES.index(category)] += 1
+
+    return features
+
+
+def build_features(embeddings, flag_lists):
+    return np.hstack([normalize(embeddings), flag_features(flag_lists)])
+
+
+# ==============================
+# LOGISTIC REGRESSION
+# ==============================
+def sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+def train(features, labels):
+    """
+    Full-batch gradient descent on L2-regularised log loss.
+    Minimising log loss keeps the output probabilities calibrated.
+    """
+    mean = features.mean(axis=0)
+    std = features.std(axis=0) + 1e-6
+    x = (features - mean) / std
+    y = labels.astype(np.float32)
+
+    weights = np.zeros(x.shape[1], dtype=np.float32)
+    bias = float(np.log((y.mean() + 1e-6) / (1 - y.mean() + 1e-6)))
+
+    for _ in range(EPOCHS):
+        error = sigmoid(x @ weights + bias) - y
+        weights -= LEARNING_RATE * (x.T @ error / len(y) + L2_PENALTY * weights)
+        bias -= LEARNING_RATE * float(error.mean())
+
+    return {"weights": weights, "bias": np.float32(bias), "mean": mean, "std": std}
+
+
+def predict(model, features):
+    x = (features - model["mean"]) / model["std"]
+    return sigmoid(x @ model["weights"] + model["bias"])
+
+
+def evaluate(model, features, labels):
+    probs = np.clip(predict(model, features), 1e-6, 1 - 1e-6)
+    return {
+        "accuracy": float(((probs >= LEARNED_THRESHOLD) == labels).mean()),
+        "log_loss": float(-(labels * np.log(probs) + (1 - labels) * np.log(1 - probs)).mean()),
+        "brier": float(((probs - labels) ** 2).mean()),
+    }
+
+
+def save_model(model, path=MODEL_FILE):
+    np.savez(path, flag_categories=np.array(FLAG_CATEGORIES), **model)
+
+
+def load_model(path=MODEL_FILE):
+    data = np.load(path)
+    if list(data["flag_categories"]) != FLAG_CATEGORIES:
+        raise ValueError(f"{path} was trained with different flag categories; retrain it")
+    return {key: data[key] for key in ["weights", "bias", "mean", "std"]}
+
+
+# ==============================
+# BATCH SCORING
+# ==============================
+def score_requirements(requirements, model_path=MODEL_FILE, cache_path=EMBEDDING_CACHE):
+    """
+    Score every requirement in one vectorised pass over the embeddings
+    cached by the duplicate stage. Returns {id: probability}, or None
+    when the model or an up-to-date cache is missing.
+    """
+    if not (os.path.exists(model_path) and os.path.exists(cache_path)):
+        return None
+
+    ids, hashes, embeddings = load_embedding_cache(cache_path)
+    row_of = {req_id: row for row, req_id in enumerate(ids)}
+
+    if any(req["id"] not in row_of for req in requirements):
+        print("⚠️ Embedding cache does not cover every requirement; skipping learned scores")
+        return None
+
+    # Same IDs can belong to another spec or an edited requirement
+    if hashes is None or any(hashes[row_of[req["id"]]] != text_hash(req["text"]) for req in requirements):
+        print("⚠️ Embedding cache was built from different requirement text; skipping learned scores")
+        return None
+
+    rows = [row_of[req["id"]] for req in requirements]
+    flag_lists = [detect_ambiguity(req["text"])[0] for req in requirements]
+    probs = predict(load_model(model_path), build_features(embeddings[rows], flag_lists))
+
+    return {req["id"]: round(float(p), 2) for req, p in zip(requirements, probs)}
+
+
+def add_learned_scores(ambiguous_results, requirements, model_path=MODEL_FILE, cache_path=EMBEDDING_CACHE):
+    """
+    Attach learned_score to every reported item and add requirements the
+    rules missed but the classifier scores as ambiguous.
+    """
+    scores = score_requirements(requirements, model_path, cache_path)
+    if scores is None:
+        return ambiguous_results
+
+    reported = {item["id"] for item in ambiguous_results}
+    for item in ambiguous_results:
+        item["learned_score"] = scores[item["id"]]
+
+    added = 0
+    for req in requirements:
+        if req["id"] not in reported and scores[req["id"]] >= LEARNED_THRESHOLD:
+            ambiguous_results.append({
+                "id": req["id"],
+                "text": req["text"],
+                "ambiguous_flags": [],
+                "ambiguity_score": 0.0,
+                "learned_score": scores[req["id"]]
+            })
+            added += 1
+
+    print(f"🧠 Learned ambiguity scores added ({added} requirement(s) flagged only by the classifier)")
+    return ambiguous_results
+
+
+# ==============================
+# TRAINING DATA
+# ==============================
+def load_labels(path=LABELS_FILE):
+    """
+    Accepts {"FR-01": true, ...} or a reviewed ambiguity report: a list
+    of items with "id" and an "ambiguous" (or "label") field. Items
+    without a label are ignored.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        return {req_id: bool(label) for req_id, label in data.items()}
+
+    labels = {}
+    for item in data:
+        label = item.get("ambiguous", item.get("label"))
+        if item.get("id") and label is not None:
+            labels[item["id"]] = bool(label)
+    return labels
+
+
+# ==============================
+# MAIN
+# ==============================
+if __name__ == "__main__":
+    from detect_ambiguity import load_requirements
+
+    parser = argparse.ArgumentParser(description="Train the learned ambiguity classifier")
+    parser.add_argument("--labels", default=LABELS_FILE)
+    parser.add_argument("--cache", default=EMBEDDING_CACHE)
+    parser.add_argument("--output", default=MODEL_FILE)
+    args = parser.parse_args()
+
+    print("🟢 Loading labels and cached embeddings...")
+    labels = load_labels(args.labels)
+    texts = {req["id"]: req["text"] for req in load_requirements()}
+    ids, hashes, embeddings = load_embedding_cache(args.cache)
+    if hashes is None:
+        raise SystemExit("❌ Embedding cache has no text hashes; rerun detect_duplicates.py")
+
+    rows = [
+        row for row, req_id in enumerate(ids)
+        if req_id in labels and req_id in texts and hashes[row] == text_hash(texts[req_id])
+    ]
+    if not rows:
+        raise SystemExit("❌ No labelled requirement found in the embedding cache")
+
+    features = build_features(embeddings[rows], [detect_ambiguity(texts[ids[row]])[0] for row in rows])
+    y = np.array([labels[ids[row]] for row in rows], dtype=np.float32)
+    print(f"Labelled requirements: {len(y)} ({int(y.sum())} ambiguous)")
+
+    order = np.random.default_rng(SEED).permutation(len(y))
+    holdout = order[:int(len(y) * HOLDOUT_FRACTION)]
+    train_rows = order[len(holdout):]
+
+    if len(holdout):
+        metrics = evaluate(train(features[train_rows], y[train_rows]), features[holdout], y[holdout])
+        print(f"📊 Holdout ({len(holdout)}): accuracy {metrics['accuracy']:.3f}, "
+              f"log loss {metrics['log_loss']:.3f}, Brier {metrics['brier']:.3f}")
+
+    save_model(train(features, y), args.output)
+    print(f"✅ Classifier saved to {args.output}")
@@ -1,6 +1,5 @@
 import json
 import re
-import spacy
 
 # =========================
 # CONFIGURATION
@@ -35,28 +34,6 @@ PERFORMANCE_PATTERNS = [
     r"latency"
 ]
 
-# =========================
-# LOAD REQUIREMENTS
-# =========================
-
-print("🟢 Loading requirements...")
-
-with open("requirements.json", "r", encoding="utf-8") as f:
-    requirements = json.load(f)
-
-# Convert dictionary to list format
-if isinstance(requirements, dict):
-    requirements = [{"id": key, "text": value} for key, value in requirements.items()]
-
-print(f"Total requirements: {len(requirements)}")
-
-# =========================
-# NLP SETUP
-# =========================
-
-print("🟢 Loading spaCy model...")
-nlp = spacy.load("en_core_web_sm")
-
 # =========================
 # HELPER FUNCTIONS
 # =========================
@@ -140,39 +117,78 @@ def detect_ambiguity(text):
 # PROCESS REQUIREMENTS
 # =========================
 
-ambiguous_results = []
-clear_count = 0
+def load_requirements(path="requirements.json"):
+    with open(path, "r", encoding="utf-8") as f:
+        requirements = json.load(f)
+
+    # Convert dictionary to list format
+    if isinstance(requirements, dict):
+        requirements = [{"id": key, "text": value} for key, value in requirements.items()]
+
+    return requirements
+
 
-for req in requirements:
-    flags, score = detect_ambiguity(req["text"])
+def analyze_requirements(requirements):
+    ambiguous_results = []
+    clear_count = 0
+
+    for req in requirements:
+        flags, score = detect_ambiguity(req["text"])
+
+        if flags:
+            ambiguous_results.append({
+                "id": req["id"],
+                "text": req["text"],
+                "ambiguous_flags": flags,
+                "ambiguity_score": score
+            })
+        else:
+            clear_count += 1
+
+    return ambiguous_results, clear_count
 
-    if flags:
-        ambiguous_results.append({
-            "id": req["id"],
-            "text": req["text"],
-            "ambiguous_flags": flags,
-            "ambiguity_score": score
-        })
-    else:
-        clear_count += 1
 
 # =========================
 # SAVE OUTPUT
 # =========================
 
-with open("ambiguity_report.json", "w", encoding="utf-8") as f:
-    json.dump(ambiguous_results, f, indent=4)
+def save_report(ambiguous_results, path="ambiguity_report.json"):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ambiguous_results, f, indent=4)
+
 
 # =========================
-# SUMMARY
+# MAIN
 # =========================
 
-ambiguous_count = len(ambiguous_results)
+def main():
+    print("🟢 Loading requirements...")
+    requirements = load_requirements()
+    print(f"Total requirements: {len(requirements)}")
+
+    ambiguous_results, clear_count = analyze_requirements(requirements)
+
+    # Calibrated score from the duplicate stage's cached embeddings, if a model was trained
+    from ambiguity_classifier import add_learned_scores
+    ambiguous_results = add_learned_scores(ambiguous_results, requirements)
+
+    save_report(ambiguous_results)
+
+    # =========================
+    # SUMMARY
+    # =========================
+
+    ambiguous_count = len(ambiguous_results)
+    clear_count = len(requirements) - ambiguous_count
+
+    print("\n✅ Ambiguity detection complete!")
+    print("📄 Saved as ambiguity_report.json")
+
+    print("\n📊 SUMMARY")
+    print(f"Total requirements: {len(requirements)}")
+    print(f"Ambiguous: {ambiguous_count}")
+    print(f"Clear: {clear_count}")
 
-print("\n✅ Ambiguity detection complete!")
-print("📄 Saved as ambiguity_report.json")
 
-print("\n📊 SUMMARY")
-print(f"Total requirements: {len(requirements)}")
-print(f"Ambiguous: {ambiguous_count}")
-print(f"Clear: {clear_count}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
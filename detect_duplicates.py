@@ -1,100 +1,335 @@
+import hashlib
 import json
-from sentence_transformers import util
-from embedding_model import get_embeddings
+import numpy as np
+from memory_governor import log_peak_usage, plan_tile_rows, run_with_backoff
 
 # ==============================
 # SETTINGS
 # ==============================
 SIMILARITY_THRESHOLD = 0.85  # Tune 0.83–0.88
+EMBEDDING_CACHE = "embeddings_cache.npz"  # Reused by ambiguity_classifier.py
+GRAPH_FILE = "similarity_graph.npz"       # Queried by similarity_graph.py
+TOP_K = 10                                # Neighbours kept per requirement
 
-print("📂 Loading requirements.json...")
 
 # ==============================
 # LOAD REQUIREMENTS (DICT FORMAT)
 # ==============================
-with open("requirements.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
+def load_requirements(path="requirements.json"):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
 
-# Your format: {"FR-01": "text", ...}
-if not isinstance(data, dict):
-    raise ValueError("requirements.json must be a dictionary of ID: text")
+    # Your format: {"FR-01": "text", ...}
+    if not isinstance(data, dict):
+        raise ValueError("requirements.json must be a dictionary of ID: text")
 
-# Convert dictionary to list of dicts
-requirements = []
-for req_id, text in data.items():
-    requirements.append({
-        "id": req_id,
-        "text": text.strip()
-    })
+    # Convert dictionary to list of dicts
+    requirements = []
+    for req_id, text in data.items():
+        requirements.append({
+            "id": req_id,
+            "text": text.strip()
+        })
 
-print(f"🔢 Total requirements: {len(requirements)}")
+    return requirements
 
-texts = [req["text"] for req in requirements]
 
 # ==============================
-# GENERATE EMBEDDINGS
+# CALCULATE SIMILARITY
 # ==============================
-print("🧠 Generating embeddings...")
-embeddings = get_embeddings(texts)
+def normalize(embeddings):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def pairs_from_scores(scores, left_offset, right_offset, threshold):
+    rows, cols = np.nonzero(scores >= threshold)
+
+    pairs = []
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        i = left_offset + r
+        j = right_offset + c
+        if i < j:
+            pairs.append((i, j, float(scores[r, c])))
+
+    return pairs
+
+
+def similar_pairs_in_block(left, right, left_offset, right_offset, threshold=SIMILARITY_THRESHOLD):
+    """
+    Return (i, j, score) for every pair in a block of the similarity
+    matrix with i < j (global indices) and score >= threshold.
+    Both inputs must already be normalized.
+    """
+    return pairs_from_scores(left @ right.T, left_offset, right_offset, threshold)
+
+
+def top_k_rows(scores, k):
+    """
+    (columns, scores) of the k best entries of every row, best first.
+    """
+    k = min(k, scores.shape[1])
+    cols = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    best = np.take_along_axis(scores, cols, axis=1)
+    order = np.argsort(-best, axis=1)
+    return np.take_along_axis(cols, order, axis=1), np.take_along_axis(best, order, axis=1)
+
+
+def tiled_similarity(left, right, left_offset, right_offset, threshold=SIMILARITY_THRESHOLD,
+                     top_k=0, both_directions=False):
+    """
+    Threshold pairs for one block of the similarity matrix, computed in
+    row tiles sized by the memory governor instead of one dense matrix.
+
+    With top_k, also returns the k nearest neighbours of every left row
+    (and of every right row if both_directions) as flat edge arrays
+    (rows, cols, scores) in global indices. Self-matches are excluded.
+    """
+    pairs = []
+    edges = []
+    col_best = None
+    start = 0
+    tile = plan_tile_rows(len(left), len(right), left.shape[1], extra_per_cell=8 if top_k else 0)
+
+    while start < len(left):
+        def compute(size):
+            scores = left[start:start + size] @ right.T
+            block_pairs = pairs_from_scores(scores, left_offset + start, right_offset, threshold)
+            if not top_k:
+                return block_pairs, None, None
+
+            # Mask self-similarity where the row and column ranges overlap
+            rows = np.arange(len(scores)) + left_offset + start
+            self_cols = rows - right_offset
+            inside = (self_cols >= 0) & (self_cols < len(right))
+            scores[np.nonzero(inside)[0], self_cols[inside]] = -np.inf
+
+            row_edges = top_k_rows(scores, top_k)
+            col_edges = top_k_rows(scores.T, top_k) if both_directions else None
+            return block_pairs, row_edges, col_edges
+
+        (block_pairs, row_edges, col_edges), size = run_with_backoff(compute, tile, "Similarity tile")
+        pairs.extend(block_pairs)
+
+        if row_edges is not None:
+            cols, best = row_edges
+            rows = np.repeat(np.arange(len(cols)) + left_offset + start, cols.shape[1])
+            edges.append((rows, cols.ravel() + right_offset, best.ravel()))
+
+        if col_edges is not None:
+            # Keep a running top-k per right row across tiles
+            cols, best = col_edges
+            cols = cols + left_offset + start
+            if col_best is not None:
+                cols = np.hstack([col_best[0], cols])
+                best = np.hstack([col_best[1], best])
+                keep, best = top_k_rows(best, top_k)
+                cols = np.take_along_axis(cols, keep, axis=1)
+            col_best = (cols, best)
+
+        tile = size
+        start += size
+
+    if col_best is not None:
+        cols, best = col_best
+        rows = np.repeat(np.arange(len(cols)) + right_offset, cols.shape[1])
+        edges.append((rows, cols.ravel(), best.ravel()))
+
+    return pairs, edges
+
+
+def tiled_similar_pairs(left, right, left_offset, right_offset, threshold=SIMILARITY_THRESHOLD):
+    return tiled_similarity(left, right, left_offset, right_offset, threshold)[0]
+
+
+def find_similar_pairs(embeddings, threshold=SIMILARITY_THRESHOLD):
+    unit = normalize(embeddings)
+    return tiled_similar_pairs(unit, unit, 0, 0, threshold)
+
+
+def find_similarity(embeddings, threshold=SIMILARITY_THRESHOLD, top_k=TOP_K):
+    """
+    Threshold pairs plus top-k neighbour edges for the whole set.
+    """
+    unit = normalize(embeddings)
+    return tiled_similarity(unit, unit, 0, 0, threshold, top_k)
+
 
 # ==============================
-# CALCULATE SIMILARITY
+# SPARSE NEIGHBOUR GRAPH
 # ==============================
-print("📊 Calculating similarity matrix...")
-cosine_scores = util.cos_sim(embeddings, embeddings)
+def build_similarity_graph(ids, edges, top_k=TOP_K):
+    """
+    Merge top-k edge candidates (from one or many blocks) into a
+    symmetric CSR graph: each requirement keeps its top_k neighbours,
+    plus any requirement that has it in its own top_k.
+    """
+    n = len(ids)
+    if edges:
+        rows = np.concatenate([e[0] for e in edges]).astype(np.int64)
+        cols = np.concatenate([e[1] for e in edges]).astype(np.int64)
+        scores = np.concatenate([e[2] for e in edges]).astype(np.float32)
+    else:
+        rows = cols = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.float32)
+
+    valid = np.isfinite(scores) & (rows != cols)
+    rows, cols, scores = rows[valid], cols[valid], scores[valid]
+
+    # Best top_k candidates per row (blocks may each contribute k)
+    order = np.lexsort((-scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    keep = rank < top_k
+    rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+    # Symmetrize, drop repeated (row, col), then order rows by score
+    rows, cols = np.concatenate([rows, cols]), np.concatenate([cols, rows])
+    scores = np.concatenate([scores, scores])
+    order = np.lexsort((-scores, cols, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    rows, cols, scores = rows[first], cols[first], scores[first]
+
+    order = np.lexsort((-scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+
+    return {
+        "ids": np.array(ids),
+        "indptr": indptr,
+        "indices": cols.astype(np.int32),
+        "scores": scores,
+        "top_k": np.int64(top_k),
+    }
+
+
+def save_similarity_graph(graph, path=GRAPH_FILE):
+    np.savez(path, **graph)
+
 
 # ==============================
 # DETECT DUPLICATES
 # ==============================
-print("🔎 Detecting duplicates...")
+def group_duplicates(total, pairs):
+    """
+    Greedy grouping: each unvisited requirement becomes the master of
+    every later requirement it is similar to. Deterministic for a given
+    set of pairs regardless of the order they were produced in.
+    """
+    neighbours = {}
+    for i, j, _ in pairs:
+        neighbours.setdefault(i, set()).add(j)
 
-visited = set()
-duplicate_groups = []
+    visited = set()
+    duplicate_groups = []
 
-for i in range(len(texts)):
-    if i in visited:
-        continue
+    for i in range(total):
+        if i in visited:
+            continue
 
-    group = [i]
+        group = [i] + sorted(neighbours.get(i, ()))
+        visited.update(group[1:])
 
-    for j in range(i + 1, len(texts)):
-        if cosine_scores[i][j] >= SIMILARITY_THRESHOLD:
-            group.append(j)
-            visited.add(j)
+        if len(group) > 1:
+            duplicate_groups.append(group)
 
-    if len(group) > 1:
-        duplicate_groups.append(group)
+    return duplicate_groups
 
-print(f"✅ Duplicate groups found: {len(duplicate_groups)}")
 
 # ==============================
 # FORMAT OUTPUT
 # ==============================
-duplicates_output = []
+def build_report(requirements, duplicate_groups, threshold=SIMILARITY_THRESHOLD):
+    duplicates_output = []
+
+    for group in duplicate_groups:
+        group_data = []
+        for idx in group:
+            group_data.append({
+                "id": requirements[idx]["id"],
+                "text": requirements[idx]["text"]
+            })
+        duplicates_output.append(group_data)
+
+    return {
+        "summary": {
+            "total_requirements": len(requirements),
+            "duplicate_groups": len(duplicate_groups),
+            "similarity_threshold": threshold
+        },
+        "duplicates": duplicates_output
+    }
 
-for group in duplicate_groups:
-    group_data = []
-    for idx in group:
-        group_data.append({
-            "id": requirements[idx]["id"],
-            "text": requirements[idx]["text"]
-        })
-    duplicates_output.append(group_data)
 
-output = {
-    "summary": {
-        "total_requirements": len(requirements),
-        "duplicate_groups": len(duplicate_groups),
-        "similarity_threshold": SIMILARITY_THRESHOLD
-    },
-    "duplicates": duplicates_output
-}
+def save_report(output, path="duplicate_report.json"):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=4, ensure_ascii=False)
+
 
 # ==============================
-# SAVE REPORT
+# EMBEDDING CACHE
 # ==============================
-with open("duplicate_report.json", "w", encoding="utf-8") as f:
-    json.dump(output, f, indent=4, ensure_ascii=False)
+def text_hash(text):
+    return hashlib.sha1(text.strip().encode("utf-8")).hexdigest()
+
+
+def save_embedding_cache(ids, texts, embeddings, path=EMBEDDING_CACHE):
+    # IDs repeat across specs and edits, so each row also records the
+    # hash of the text it embeds
+    np.savez(
+        path,
+        ids=np.array(ids),
+        text_hashes=np.array([text_hash(t) for t in texts]),
+        embeddings=np.asarray(embeddings, dtype=np.float32),
+    )
+
+
+def load_embedding_cache(path=EMBEDDING_CACHE):
+    """
+    Return (ids, text_hashes, embeddings). text_hashes is None for caches
+    written before hashes were stored.
+    """
+    data = np.load(path)
+    hashes = data["text_hashes"].tolist() if "text_hashes" in data.files else None
+    return data["ids"].tolist(), hashes, data["embeddings"]
+
+
+# ==============================
+# MAIN
+# ==============================
+def main():
+    from embedding_model import get_embeddings
+
+    print("📂 Loading requirements.json...")
+    requirements = load_requirements()
+    print(f"🔢 Total requirements: {len(requirements)}")
+
+    texts = [req["text"] for req in requirements]
+
+    print("🧠 Generating embeddings...")
+    embeddings = get_embeddings(texts)
+    save_embedding_cache([req["id"] for req in requirements], texts, embeddings)
+
+    print("📊 Calculating similarity matrix...")
+    pairs, edges = find_similarity(embeddings)
+    save_similarity_graph(build_similarity_graph([req["id"] for req in requirements], edges))
+
+    print("🔎 Detecting duplicates...")
+    duplicate_groups = group_duplicates(len(texts), pairs)
+    print(f"✅ Duplicate groups found: {len(duplicate_groups)}")
+    log_peak_usage("Duplicate detection")
+
+    save_report(build_report(requirements, duplicate_groups))
+
+    print("📁 duplicate_report.json generated successfully!")
+    print(f"🕸️ Top-{TOP_K} neighbour graph saved to {GRAPH_FILE}")
+    print("🚀 Duplicate detection completed.")
+
 
-print("📁 duplicate_report.json generated successfully!")
-print("🚀 Duplicate detection completed.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,28 @@
-from sentence_transformers import SentenceTransformer
+from memory_governor import plan_encode_batch, run_with_backoff
 
 MODEL_PATH = r"D:\SRS_Analyzer\models\models--sentence-transformers--all-mpnet-base-v2\snapshots\e8c3b32edf5434bc2275fc9bab85f82640a19130"
 
-print("🟢 Loading MPNet from local project folder...")
+MODEL = None
 
-MODEL = SentenceTransformer(MODEL_PATH)
+def get_model():
+    # Loaded on first use so importing this module stays cheap
+    global MODEL
+    if MODEL is None:
+        from sentence_transformers import SentenceTransformer
 
-print("✅ Model loaded successfully!")
+        print("🟢 Loading MPNet from local project folder...")
+        MODEL = SentenceTransformer(MODEL_PATH)
+        print("✅ Model loaded successfully!")
+    return MODEL
 
-def get_embeddings(texts):
-    return MODEL.encode(texts, convert_to_tensor=True)
\ No newline at end of file
+def get_embeddings(texts, batch_size=32):
+    model = get_model()
+    batch_size = plan_encode_batch(texts, batch_size)
+
+    def encode(size):
+        return model.encode(texts, batch_size=size, convert_to_numpy=True)
+
+    embeddings, used = run_with_backoff(encode, batch_size, "Encode")
+    if used != batch_size:
+        print(f"🧮 Encode finished with batch size {used}")
+    return embeddings
\ No newline at end of file
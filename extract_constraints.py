@@ -0,0 +1,416 @@
+import bisect
+import json
+import math
+import re
+
+# =========================
+# CONFIGURATION
+# =========================
+
+# Comparator phrases, longest first so "no more than" wins over "more than"
+COMPARATORS = [
+    ("no more than", "<="), ("not more than", "<="), ("not exceeding", "<="),
+    ("not to exceed", "<="), ("a maximum of", "<="), ("maximum of", "<="),
+    ("at most", "<="), ("up to", "<="), ("within", "<="),
+    ("no less than", ">="), ("not less than", ">="), ("a minimum of", ">="),
+    ("minimum of", ">="), ("at least", ">="),
+    ("less than", "<"), ("fewer than", "<"), ("under", "<"), ("below", "<"),
+    ("more than", ">"), ("greater than", ">"), ("over", ">"), ("above", ">"),
+]
+
+# Unit -> (SI unit, factor)
+UNITS = {
+    "ms": ("s", 0.001), "millisecond": ("s", 0.001), "milliseconds": ("s", 0.001),
+    "s": ("s", 1), "sec": ("s", 1), "secs": ("s", 1), "second": ("s", 1), "seconds": ("s", 1),
+    "min": ("s", 60), "mins": ("s", 60), "minute": ("s", 60), "minutes": ("s", 60),
+    "hr": ("s", 3600), "hrs": ("s", 3600), "hour": ("s", 3600), "hours": ("s", 3600),
+    "day": ("s", 86400), "days": ("s", 86400),
+    "kb": ("B", 1e3), "mb": ("B", 1e6), "gb": ("B", 1e9), "tb": ("B", 1e12),
+    "%": ("ratio", 0.01), "percent": ("ratio", 0.01),
+}
+
+RATE_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Metric keywords with the SI units they are measured in. A value takes the
+# nearest keyword in its own clause that fits its unit.
+METRIC_KEYWORDS = [
+    (r"\bload times?\b", "load_time", {"s"}),
+    (r"\bresponse time degradation\b", "response_time_degradation", {"ratio"}),
+    (r"\bresponse times?\b", "response_time", {"s"}),
+    (r"\blatency\b", "latency", {"s"}),
+    (r"\brecovery time objective\b|\brto\b", "recovery_time_objective", {"s"}),
+    (r"\brecovery point objective\b|\brpo\b", "recovery_point_objective", {"s"}),
+    (r"\bavailability\b|\buptime\b", "availability", {"ratio"}),
+    (r"\bcpu\b", "cpu_utilization", {"ratio"}),
+    (r"\bmemory\b", "memory_utilization", {"ratio", "B"}),
+    (r"\bcode coverage\b", "code_coverage", {"ratio"}),
+    (r"\bstorage\b", "storage", {"B", "ratio"}),
+    (r"\bthroughput\b", "throughput", {"1/s"}),
+]
+
+# Significant digits kept after unit conversion (99.9% -> 0.999, not 0.9990000000000001)
+VALUE_DIGITS = 12
+
+# Default comparator when a value is stated without one
+DEFAULT_COMPARATORS = {
+    "availability": ">=",
+    "code_coverage": ">=",
+}
+
+# Metrics assigned from the unit alone ("within 2 seconds"). They say nothing
+# about what is being timed, so they are reported but never compared.
+UNINDEXED_METRICS = {"duration"}
+
+# Operating conditions that make two constraints on one metric independent.
+# Only condition phrases count: "standard" also names operations and queries.
+SCOPES = [
+    (r"\bnon-standard (?:operating )?hours\b|\boff[- ]hours\b", "off_hours"),
+    (r"\bstandard (?:operating |business )?hours\b|\bbusiness hours\b", "business_hours"),
+    (r"\bnon-critical\b", "non_critical"),
+    (r"\bpeak\b", "peak"),
+    (r"\bcritical\b", "critical"),
+    (r"\bnormal\b", "normal"),
+]
+
+NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+UNIT_PATTERN = "|".join(sorted((re.escape(u) for u in UNITS), key=len, reverse=True))
+COMPARATOR_PATTERN = "|".join(re.escape(phrase) for phrase, _ in COMPARATORS)
+
+RANGE_RE = re.compile(
+    rf"\bbetween\s+({NUMBER})\s*(?:({UNIT_PATTERN})\b\s*)?and\s+({NUMBER})\s*({UNIT_PATTERN})(?![a-z])",
+    re.IGNORECASE,
+)
+VALUE_RE = re.compile(
+    rf"(?:\b({COMPARATOR_PATTERN})\s+)?({NUMBER})\s*"
+    rf"(?:({UNIT_PATTERN})(?![a-z])|((?:[a-z-]+\s+){{1,4}}?)per\s+({'|'.join(RATE_PERIODS)})\b|((?:[a-z-]+\s+){{0,2}}[a-z-]+))?",
+    re.IGNORECASE,
+)
+
+STOP_WORDS = {"the", "of", "for", "during", "without", "in", "and", "or", "with", "to", "a", "an"}
+
+# =========================
+# LOAD REQUIREMENTS
+# =========================
+
+def load_requirements(path="requirements.json"):
+    with open(path, "r", encoding="utf-8") as f:
+        requirements = json.load(f)
+
+    if isinstance(requirements, list):
+        requirements = {item["id"]: item["text"] for item in requirements}
+
+    return requirements
+
+
+# =========================
+# PARSING
+# =========================
+
+def to_number(text):
+    return float(text.replace(",", ""))
+
+
+def nearest_metric(text, si_unit, span):
+    """
+    Metric of the keyword closest to span (the matched value) among the
+    keywords measured in si_unit, or None.
+    """
+    best = None
+    for pattern, metric, units in METRIC_KEYWORDS:
+        if si_unit not in units:
+            continue
+        for keyword in re.finditer(pattern, text, re.IGNORECASE):
+            distance = max(span[0] - keyword.end(), keyword.start() - span[1], 0)
+            if best is None or distance < best[0]:
+                best = (distance, metric)
+    return best[1] if best else None
+
+
+def find_metric(clause, span, text, si_unit):
+    """
+    Metric for a value at span in clause; the rest of the requirement is
+    only consulted when the clause names no metric of that unit.
+    """
+    metric = nearest_metric(clause, si_unit, span) or nearest_metric(text, si_unit, (0, 0))
+    if metric:
+        return metric
+    if si_unit == "s":
+        return "duration"
+    return None
+
+
+def round_value(value):
+    return float(f"{value:.{VALUE_DIGITS}g}")
+
+
+def find_scope(text):
+    text_lower = text.lower()
+    for pattern, scope in SCOPES:
+        if re.search(pattern, text_lower):
+            return scope
+    return ""
+
+
+def count_noun(words):
+    """
+    First noun phrase after a bare number ("1,000 concurrent users
+    during ..." -> "concurrent users").
+    """
+    kept = []
+    for word in words.lower().split():
+        if word in STOP_WORDS:
+            break
+        kept.append(word)
+    return " ".join(kept)
+
+
+def make_constraint(req_id, text, metric, comparator, value, unit, raw):
+    return {
+        "id": req_id,
+        "metric": metric,
+        "scope": find_scope(text),
+        "comparator": comparator,
+        "value": value,
+        "unit": unit,
+        "raw": raw.strip(),
+    }
+
+
+def same_limit(a, b):
+    return all(a[key] == b[key] for key in ["metric", "scope", "comparator", "value", "unit"])
+
+
+def parse_constraints(req_id, text):
+    """
+    Extract (metric, comparator, value, unit) rows from one requirement,
+    with values normalized to SI units (s, B, ratio, 1/s, count).
+    """
+    constraints = []
+
+    for match in RANGE_RE.finditer(text):
+        si_unit, factor = UNITS[match.group(4).lower()]
+        # "between 500 ms and 2 seconds": the low bound may carry its own unit
+        low_unit, low_factor = UNITS[match.group(2).lower()] if match.group(2) else (si_unit, factor)
+        metric = find_metric(text, match.span(), text, si_unit)
+        if metric and low_unit == si_unit:
+            low = round_value(to_number(match.group(1)) * low_factor)
+            high = round_value(to_number(match.group(3)) * factor)
+            constraints.append(make_constraint(
+                req_id, text, metric, "between", sorted([low, high]), si_unit, match.group()
+            ))
+
+    # Blank out ranges, then parse clause by clause so "4 hours for critical
+    # ... and 24 hours for non-critical ..." keeps a scope per value
+    masked = RANGE_RE.sub(lambda m: " " * len(m.group()), text)
+
+    for clause in re.split(r"[;,]\s+|\s+and\s+(?=\d)", masked):
+        for match in VALUE_RE.finditer(clause):
+            phrase, number, unit, rate_noun, period, noun = match.groups()
+            raw = match.group()
+            comparator = dict(COMPARATORS)[phrase.lower()] if phrase else None
+            value = to_number(number)
+
+            if unit:
+                si_unit, factor = UNITS[unit.lower()]
+                metric = find_metric(clause, match.span(), text, si_unit)
+                value *= factor
+            elif period:
+                si_unit = "1/s"
+                metric = "rate:" + count_noun(rate_noun) if rate_noun else "rate"
+                value /= RATE_PERIODS[period.lower()]
+            elif comparator and noun:
+                si_unit = "count"
+                metric = "count:" + count_noun(noun)
+                raw = f"{phrase} {number} {count_noun(noun)}"
+            else:
+                # Versions and identifiers ("TLS 1.3", "AES-256") carry no comparator or unit
+                continue
+
+            if not metric or metric == "count:":
+                continue
+
+            comparator = comparator or DEFAULT_COMPARATORS.get(metric, "<=" if si_unit == "s" else "=")
+            constraint = make_constraint(req_id, clause, metric, comparator, round_value(value), si_unit, raw)
+
+            # A restated value ("RPO of 1 hour, meaning no more than 1 hour") is one constraint
+            if not any(same_limit(constraint, other) for other in constraints):
+                constraints.append(constraint)
+
+    return constraints
+
+
+# =========================
+# INTERVAL INDEX
+# =========================
+
+def to_interval(constraint):
+    """
+    (low, high, low_closed, high_closed) for the values a constraint allows.
+    """
+    comparator, value = constraint["comparator"], constraint["value"]
+    if comparator == "between":
+        return value[0], value[1], True, True
+    if comparator == "<":
+        return -math.inf, value, False, False
+    if comparator == "<=":
+        return -math.inf, value, False, True
+    if comparator == ">":
+        return value, math.inf, False, False
+    if comparator == ">=":
+        return value, math.inf, True, False
+    return value, value, True, True
+
+
+def build_index(constraints):
+    """
+    Per (metric, scope, unit) list of (interval, constraint), sorted by
+    low bound ascending and high bound descending.
+    """
+    index = {}
+    for constraint in constraints:
+        if constraint["metric"] in UNINDEXED_METRICS:
+            continue
+        key = (constraint["metric"], constraint["scope"], constraint["unit"])
+        index.setdefault(key, []).append((to_interval(constraint), constraint))
+
+    for entries in index.values():
+        entries.sort(key=lambda e: (e[0][0], not e[0][2], -e[0][1], not e[0][3]))
+
+    return index
+
+
+def below(high, high_closed, low, low_closed):
+    """True when an interval ending at high lies entirely below one starting at low."""
+    return high < low or (high == low and not (high_closed and low_closed))
+
+
+def describe(constraint):
+    value = constraint["value"]
+    if constraint["comparator"] == "between":
+        return f"{constraint['id']} (between {value[0]:g} and {value[1]:g} {constraint['unit']})"
+    return f"{constraint['id']} ({constraint['comparator']} {value:g} {constraint['unit']})"
+
+
+def contains(outer, inner):
+    """True when every value allowed by inner is also allowed by outer."""
+    o_low, o_high, o_low_closed, o_high_closed = outer
+    i_low, i_high, i_low_closed, i_high_closed = inner
+    low_ok = o_low < i_low or (o_low == i_low and (o_low_closed or not i_low_closed))
+    high_ok = o_high > i_high or (o_high == i_high and (o_high_closed or not i_high_closed))
+    return low_ok and high_ok
+
+
+def find_conflicts(index):
+    """
+    Sorted sweep per metric group, O(n log n + k) for k reported rows:
+    - contradictory: every pair whose allowed ranges do not intersect,
+      found as a prefix of the group sorted by high bound
+    - duplicate: every constraint whose range equals an earlier one
+    - subsumed / overlapping: each constraint against the loosest
+      earlier limit only (the one with the highest high bound), so
+      nested chains are not expanded into every pair
+    """
+    conflicts = []
+
+    for (metric, scope, unit), entries in index.items():
+        def report(kind, first, second):
+            if first["id"] == second["id"]:
+                return
+            conflicts.append({
+                "type": kind,
+                "metric": metric,
+                "scope": scope,
+                "req1": first["id"],
+                "req2": second["id"],
+                "detail": f"{describe(first)} vs {describe(second)}",
+            })
+
+        # Open high bounds sort before closed ones at the same value
+        by_high = sorted(entries, key=lambda e: (e[0][1], e[0][3]))
+        high_keys = [(interval[1], interval[3]) for interval, _ in by_high]
+
+        widest = None       # earlier entry with the highest high bound
+        run_start = None    # first entry of the current run of identical ranges
+
+        for interval, constraint in entries:
+            low, high, low_closed, high_closed = interval
+
+            # Ranges ending below this low bound (touching counts unless both closed)
+            end = bisect.bisect_right(high_keys, (low, not low_closed))
+            for _, other in by_high[:end]:
+                report("contradictory", other, constraint)
+
+            if run_start and run_start[0] == interval:
+                report("duplicate", run_start[1], constraint)
+            else:
+                run_start = (interval, constraint)
+                if widest and not below(widest[0][1], widest[0][3], low, low_closed):
+                    kind = "subsumed" if contains(widest[0], interval) else "overlapping"
+                    report(kind, widest[1], constraint)
+
+            if widest is None or (high, high_closed) > (widest[0][1], widest[0][3]):
+                widest = (interval, constraint)
+
+    return conflicts
+
+
+def json_safe(constraint):
+    low, high, _, _ = to_interval(constraint)
+    row = dict(constraint)
+    row["min"] = None if low == -math.inf else low
+    row["max"] = None if high == math.inf else high
+    return row
+
+
+def analyze_constraints(requirements):
+    constraints = []
+    for req_id, text in requirements.items():
+        constraints.extend(parse_constraints(req_id, text))
+
+    conflicts = find_conflicts(build_index(constraints))
+
+    return {
+        "summary": {
+            "constraint_count": len(constraints),
+            "requirements_with_constraints": len({c["id"] for c in constraints}),
+            "conflict_count": len(conflicts),
+            "conflicts_listed": "every contradictory and duplicate pair; subsumed and overlapping "
+                                "against the loosest earlier limit only",
+        },
+        "constraints": [json_safe(c) for c in constraints],
+        "conflicts": conflicts,
+    }
+
+
+# =========================
+# SAVE OUTPUT
+# =========================
+
+def save_report(report, path="constraint_report.json"):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+
+# =========================
+# MAIN
+# =========================
+
+def main():
+    print("🟢 Loading requirements...")
+    requirements = load_requirements()
+    print(f"Total requirements: {len(requirements)}")
+
+    report = analyze_constraints(requirements)
+    save_report(report)
+
+    print("\n✅ Constraint extraction complete!")
+    print("📄 Saved as constraint_report.json")
+
+    print("\n📊 SUMMARY")
+    print(f"Constraints extracted: {report['summary']['constraint_count']}")
+    print(f"Requirements with constraints: {report['summary']['requirements_with_constraints']}")
+    print(f"Conflicts found: {report['summary']['conflict_count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
 import json
 import re
-from docx import Document
 
 # -----------------------------------------
 # STEP 1: Load Document
 # -----------------------------------------
 
 def load_doc(path):
+    from docx import Document
+
     print("\n🟢 Loading document...")
     doc = Document(path)
     print("Total paragraphs:", len(doc.paragraphs))
@@ -50,6 +51,24 @@ def extract_table_text(doc):
     return text_list
 
 
+def iter_text_blocks(doc):
+    """
+    Paragraphs then table cells, in the same order as combine_text,
+    without building the lists first.
+    """
+    for para in doc.paragraphs:
+        t = para.text.strip()
+        if t:
+            yield t
+
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                t = cell.text.strip()
+                if t:
+                    yield t
+
+
 # -----------------------------------------
 # STEP 4: Combine both sources
 # -----------------------------------------
@@ -98,27 +117,52 @@ def is_valid_requirement(text):
 # STEP 6: Extract requirements (Improved)
 # -----------------------------------------
 
-def extract_requirements(text_blocks):
-    print("\n🟣 Extracting requirements (Improved)...")
-
-    req_dict = {}
+def iter_raw_requirements(text_blocks):
+    """
+    Yield (req_id, text) as soon as each requirement is complete, i.e.
+    when the next ID (or the end of the input) is reached. A repeated ID
+    is yielded again and replaces the earlier text.
+    """
     current_id = None
+    current_text = None
 
     for line in text_blocks:
         match = re.search(REQ_PATTERN, line)
 
         if match:
+            if current_id:
+                yield current_id, current_text
+
             req_id = match.group()
             text_after = line.split(req_id, 1)[-1]
 
-            cleaned_text = clean_requirement_text(text_after)
-
-            req_dict[req_id] = cleaned_text
+            current_text = clean_requirement_text(text_after)
             current_id = req_id
 
         else:
             if current_id:
-                req_dict[current_id] += " " + line
+                current_text += " " + line
+
+    if current_id:
+        yield current_id, current_text
+
+
+def iter_requirements(text_blocks):
+    """
+    Streaming version of extract_requirements: yields cleaned
+    (req_id, text) pairs while the text blocks are still being read.
+    text is None for an invalid occurrence, which withdraws the ID just
+    as extract_requirements would drop it.
+    """
+    for req_id, text in iter_raw_requirements(text_blocks):
+        cleaned_text = clean_requirement_text(text)
+        yield req_id, cleaned_text if is_valid_requirement(cleaned_text) else None
+
+
+def extract_requirements(text_blocks):
+    print("\n🟣 Extracting requirements (Improved)...")
+
+    req_dict = dict(iter_raw_requirements(text_blocks))
 
     print("Total Raw Extracted:", len(req_dict))
 
@@ -167,11 +211,15 @@ def print_samples(req_dict, n=10):
 # MAIN PIPELINE
 # -----------------------------------------
 
-if __name__ == "__main__":
-    doc = load_doc("SRS.docx")
+def main(path="SRS.docx"):
+    doc = load_doc(path)
     paragraphs = extract_paragraph_text(doc)
     table_text = extract_table_text(doc)
     all_blocks = combine_text(paragraphs, table_text)
     requirements = extract_requirements(all_blocks)
     save_json(requirements)
-    print_samples(requirements)
\ No newline at end of file
+    print_samples(requirements)
+
+
+if __name__ == "__main__":
+    main()
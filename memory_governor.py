@@ -0,0 +1,231 @@
+import gc
+import os
+import sys
+
+# ==============================
+# SETTINGS
+# ==============================
+# RSS ceiling in MB. Falls back to the cgroup limit, then to this process's
+# RSS plus the host's MemAvailable (so other tenants count), then to
+# physical memory.
+# The ceiling is per process: concurrent shard workers each plan against all
+# of it, so give each worker its share when several run on one host.
+MEMORY_LIMIT_MB = os.environ.get("SRS_MEMORY_LIMIT_MB")
+
+# Only plan to use this share of the headroom left under the ceiling
+SAFETY_FRACTION = 0.7
+
+# MPNet (all-mpnet-base-v2) shape used for encode estimates
+HIDDEN_SIZE = 768
+ATTENTION_HEADS = 12
+FFN_SIZE = 3072
+MAX_SEQ_LENGTH = 384
+TOKENS_PER_WORD = 1.4
+
+CGROUP_LIMIT_FILES = [
+    "/sys/fs/cgroup/memory.max",                    # cgroup v2
+    "/sys/fs/cgroup/memory/memory.limit_in_bytes",  # cgroup v1
+]
+
+MB = 1024 * 1024
+
+# Allocation failures from torch: CUDA says "out of memory", the CPU
+# allocator "DefaultCPUAllocator: can't allocate memory"
+OOM_MESSAGES = ["out of memory", "can't allocate memory", "cannot allocate memory"]
+
+
+# ==============================
+# MEMORY READINGS
+# ==============================
+def _read_proc_status(field):
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _mem_available():
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _cgroup_limit():
+    for path in CGROUP_LIMIT_FILES:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # "max" (v2) or a huge sentinel (v1) both mean unlimited
+        if value.isdigit() and int(value) < (1 << 60):
+            return int(value)
+    return None
+
+
+def _physical_memory():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def memory_limit():
+    """
+    Return (limit_bytes, source) for the configured RSS ceiling.
+    """
+    if MEMORY_LIMIT_MB:
+        return int(float(MEMORY_LIMIT_MB) * MB), "SRS_MEMORY_LIMIT_MB"
+
+    limit = _cgroup_limit()
+    if limit:
+        return limit, "cgroup"
+
+    # On a shared host the ceiling is what we hold plus what is still free
+    available, rss = _mem_available(), current_rss()
+    if available is not None and rss is not None:
+        return rss + available, "available memory"
+
+    return _physical_memory(), "physical memory"
+
+
+def current_rss():
+    rss = _read_proc_status("VmRSS")
+    if rss is None:
+        rss = peak_rss()
+    return rss
+
+
+def peak_rss():
+    """
+    Peak RSS in bytes, or None where neither /proc nor the Unix-only
+    resource module is available (Windows).
+    """
+    peak = _read_proc_status("VmHWM")
+    if peak is None:
+        try:
+            import resource
+        except ImportError:
+            return None
+        # ru_maxrss is KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != "darwin":
+            peak *= 1024
+    return peak
+
+
+def headroom():
+    """
+    Bytes the next step may allocate without crossing the ceiling, or
+    None when there is no limit or no RSS reading to plan against.
+    """
+    limit, _ = memory_limit()
+    rss = current_rss()
+    if not limit or rss is None:
+        return None
+    return max(int((limit - rss) * SAFETY_FRACTION), 0)
+
+
+# ==============================
+# SIZE PLANNING
+# ==============================
+def estimate_encode_bytes_per_item(texts):
+    """
+    Peak activation memory for one sequence in a single transformer
+    layer (inference frees each layer before the next).
+    """
+    longest = max((len(t.split()) for t in texts), default=1)
+    seq = min(int(longest * TOKENS_PER_WORD) + 2, MAX_SEQ_LENGTH)
+
+    attention = ATTENTION_HEADS * seq * seq * 4
+    hidden = seq * (4 * HIDDEN_SIZE + FFN_SIZE) * 4
+    return attention + hidden
+
+
+def plan_encode_batch(texts, requested=32):
+    room = headroom()
+    if room is None:
+        batch = requested
+    else:
+        batch = room // estimate_encode_bytes_per_item(texts)
+        batch = int(max(1, min(requested, batch)))
+
+    print(f"🧮 Encode batch size: {batch} (requested {requested}, {describe_headroom(room)})")
+    return batch
+
+
+def plan_tile_rows(rows, cols, dim, requested=None, extra_per_cell=0):
+    """
+    Rows per similarity tile so that the float32 score tile, its
+    threshold mask and the row embeddings fit in the headroom.
+    extra_per_cell covers per-score temporaries such as top-k indices.
+    """
+    requested = requested or rows
+    room = headroom()
+    if room is None:
+        tile = requested
+    else:
+        per_row = cols * (5 + extra_per_cell) + dim * 4
+        tile = int(max(1, min(requested, room // max(per_row, 1))))
+
+    print(f"🧮 Similarity tile: {tile} x {cols} rows ({describe_headroom(room)})")
+    return tile
+
+
+def describe_headroom(room):
+    limit, source = memory_limit()
+    if room is None:
+        return "no memory limit found" if not limit else "no RSS reading on this platform"
+    return f"{room / MB:.0f} MB usable of {limit / MB:.0f} MB {source} limit"
+
+
+# ==============================
+# BACKOFF
+# ==============================
+def is_out_of_memory(error):
+    if isinstance(error, MemoryError):
+        return True
+    torch = sys.modules.get("torch")
+    torch_oom = getattr(torch, "OutOfMemoryError", None) if torch is not None else None
+    if torch_oom is not None and isinstance(error, torch_oom):
+        return True
+    message = str(error).lower()
+    return isinstance(error, RuntimeError) and any(text in message for text in OOM_MESSAGES)
+
+
+def release_memory():
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def run_with_backoff(step, size, label):
+    """
+    Call step(size), halving size after each allocation failure.
+    Returns (result, size_that_worked).
+    """
+    while True:
+        try:
+            return step(size), size
+        except (MemoryError, RuntimeError) as e:
+            if not is_out_of_memory(e) or size <= 1:
+                raise
+            release_memory()
+            size = max(1, size // 2)
+            print(f"⚠️ {label}: allocation failed, retrying with size {size}")
+
+
+def log_peak_usage(label):
+    peak = peak_rss()
+    if peak is not None:
+        print(f"📈 {label} peak RSS: {peak / MB:.0f} MB")
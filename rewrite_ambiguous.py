@@ -1,30 +1,34 @@
 import json
 import time
 import re
-from openai import OpenAI
+from detect_ambiguity import detect_ambiguity
 
 # ============================================
 # CONNECT TO LM STUDIO
 # ============================================
-client = OpenAI(base_url="http://localhost:1234/v1", api_key="lm-studio")
+client = None
+
+
+def get_client():
+    # Created on first use so the openai package is only imported when rewriting
+    global client
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(base_url="http://localhost:1234/v1", api_key="lm-studio")
+    return client
 
 BATCH_SIZE = 8
 RETRY_DELAY = 2
 
-print("🟢 Loading ambiguous items...")
-
-with open("ambiguity_report.json", "r", encoding="utf-8") as f:
-    amb_data = json.load(f)
 
-if isinstance(amb_data, list):
-    ambiguous_items = amb_data
-else:
-    ambiguous_items = [{"id": k, "text": v} for k, v in amb_data.items()]
+def load_ambiguous_items(path="ambiguity_report.json"):
+    with open(path, "r", encoding="utf-8") as f:
+        amb_data = json.load(f)
 
-total = len(ambiguous_items)
-print("Total ambiguous requirements:", total)
+    if isinstance(amb_data, list):
+        return amb_data
+    return [{"id": k, "text": v} for k, v in amb_data.items()]
 
-output = []
 
 # ============================================
 # CLEANUP & VALIDATION
@@ -79,6 +83,60 @@ def template_rewrite(text):
     return rewritten
 
 
+# ============================================
+# RULE-BASED FAST PATH
+# ============================================
+
+def fix_weak_modal(text):
+    # Only the "The system SHOULD ..." form. MAY/MIGHT mark optional or
+    # permitted behaviour, so they go to the LLM rather than become SHALL.
+    return re.sub(r"^(the system)\s+should\b", r"\1 SHALL", text, flags=re.IGNORECASE)
+
+
+def fix_process_noun(text):
+    # "registration process" is a noun phrase, not the vague verb
+    return re.sub(r"\b(\w+(?:ion|ing))\s+process\b", r"\1 workflow", text, flags=re.IGNORECASE)
+
+
+def fix_open_list(text):
+    # "a, b, etc" -> "a, b": the enumerated list becomes the complete list
+    text = re.sub(r",?\s*\b(?:etc\b\.?|and so on\b)", "", text, flags=re.IGNORECASE)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+# Flag -> transformation; flags not listed here always go to the LLM
+FLAG_RULES = {
+    "weak_modal:should": fix_weak_modal,
+    "vague_verb:process": fix_process_noun,
+    "vague_word:etc": fix_open_list,
+    "vague_word:and so on": fix_open_list,
+}
+
+
+def rule_rewrite(item):
+    """
+    Rewrite a requirement whose flags all have a mechanical fix.
+    Returns None unless the result starts with "The system SHALL" and
+    detect_ambiguity no longer flags it.
+    """
+    flags = item.get("ambiguous_flags") or []
+    if not flags or any(flag not in FLAG_RULES for flag in flags):
+        return None
+
+    rewritten = item["text"].strip()
+    for flag in flags:
+        rewritten = FLAG_RULES[flag](rewritten)
+
+    if not rewritten.lower().startswith("the system shall"):
+        return None
+    if detect_ambiguity(rewritten)[0]:
+        return None
+
+    if not rewritten.endswith("."):
+        rewritten += "."
+    return rewritten
+
+
 # ============================================
 # STRICT LLM REWRITE
 # ============================================
@@ -113,7 +171,7 @@ Rewrite:
 
     for attempt in range(3):
         try:
-            response = client.chat.completions.create(
+            response = get_client().chat.completions.create(
                 model="qwen2.5-coder-1.5b-instruct",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=1500,
@@ -164,30 +222,83 @@ def parse_output(raw_output, batch):
 # PROCESS BATCHES
 # ============================================
 
-print("🔄 Rewriting started...")
+def rewrite_items(ambiguous_items):
+    """
+    Rewrite every item, using the rule fast path where it verifies and
+    batching only the rest to the LLM. Returns (output, summary).
+    """
+    rewritten = {}
+    llm_items = []
+
+    for item in ambiguous_items:
+        result = rule_rewrite(item)
+        if result is None:
+            llm_items.append(item)
+        else:
+            rewritten[item["id"]] = (result, "rule")
 
-for i in range(0, total, BATCH_SIZE):
-    batch = ambiguous_items[i:i+BATCH_SIZE]
-    print(f"Processing batch {i//BATCH_SIZE + 1} / {((total-1)//BATCH_SIZE)+1}")
+    print(f"⚡ Rule fast path: {len(rewritten)} item(s), LLM: {len(llm_items)} item(s)")
 
-    raw_output = rewrite_batch(batch)
-    parsed = parse_output(raw_output, batch)
+    batches = (len(llm_items) + BATCH_SIZE - 1) // BATCH_SIZE
+    for i in range(0, len(llm_items), BATCH_SIZE):
+        batch = llm_items[i:i+BATCH_SIZE]
+        print(f"Processing batch {i//BATCH_SIZE + 1} / {batches}")
 
-    for item in batch:
+        raw_output = rewrite_batch(batch)
+        parsed = parse_output(raw_output, batch)
+
+        for item in batch:
+            rewritten[item["id"]] = (parsed[item["id"]], "llm")
+
+        time.sleep(0.2)
+
+    output = []
+    for item in ambiguous_items:
+        text, method = rewritten[item["id"]]
         output.append({
             "id": item["id"],
             "original": item["text"],
-            "rewritten": parsed[item["id"]]
+            "rewritten": text,
+            "method": method
         })
 
-    time.sleep(0.2)
+    summary = {
+        "total_items": len(ambiguous_items),
+        "rule_rewrites": len(ambiguous_items) - len(llm_items),
+        "llm_rewrites": len(llm_items),
+        "llm_calls": batches,
+        "llm_calls_avoided": (len(ambiguous_items) + BATCH_SIZE - 1) // BATCH_SIZE - batches
+    }
+
+    return output, summary
+
 
 # ============================================
-# SAVE OUTPUT
+# MAIN
 # ============================================
 
-with open("rewritten_ambiguity.json", "w", encoding="utf-8") as f:
-    json.dump(output, f, indent=4, ensure_ascii=False)
+def main():
+    print("🟢 Loading ambiguous items...")
+    ambiguous_items = load_ambiguous_items()
+    print("Total ambiguous requirements:", len(ambiguous_items))
+
+    print("🔄 Rewriting started...")
+    output, summary = rewrite_items(ambiguous_items)
+
+    with open("rewritten_ambiguity.json", "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=4, ensure_ascii=False)
+
+    with open("rewrite_summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4)
+
+    print("\n✅ Batch rewriting complete!")
+    print("📄 Saved as rewritten_ambiguity.json")
+
+    print("\n📊 SUMMARY")
+    print(f"Rule-based rewrites: {summary['rule_rewrites']}")
+    print(f"LLM rewrites: {summary['llm_rewrites']} in {summary['llm_calls']} call(s)")
+    print(f"LLM calls avoided: {summary['llm_calls_avoided']}")
+
 
-print("\n✅ Batch rewriting complete!")
-print("📄 Saved as rewritten_ambiguity.json")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,7 @@ if __name__ == "__main__":
     run_script("main.py")                  # Extraction
     run_script("detect_duplicates.py")     # Duplicate Detection
     run_script("detect_ambiguity.py")      # Ambiguity Detection
+    run_script("extract_constraints.py")   # Quantitative Constraints
     run_script("annotate_srs.py")   
     run_script("rewrite_ambiguous.py")
 
@@ -0,0 +1,453 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# ==============================
+# SETTINGS
+# ==============================
+WORK_DIR = "shard_work"
+POLL_INTERVAL = 0.5
+HEARTBEAT_INTERVAL = 5   # seconds between a worker's touches of its claimed task
+CLAIM_TIMEOUT = 60       # a claim untouched this long belongs to a dead worker
+MAX_ATTEMPTS = 3         # claims lost to dead workers before the task fails the run
+
+# Every worker process loads its own torch + MPNet copy for map tasks
+DEFAULT_LOCAL_WORKERS = 2
+
+# Coordinator layout (shared between the coordinator and every worker):
+#   <work_dir>/tasks/pending/   tasks waiting for a worker
+#   <work_dir>/tasks/claimed/   tasks a worker has taken (atomic rename to
+#                               <worker>__<task>), touched every HEARTBEAT_INTERVAL
+#   <work_dir>/tasks/done/      finished tasks
+#   <work_dir>/tasks/failed/    tasks that raised, with the error message
+#   <work_dir>/data/            shard inputs and outputs
+#   <work_dir>/tmp/             task files being written (renamed into tasks/)
+#   <work_dir>/STOP             tells idle workers to exit
+#
+# Workers on other hosts only need the work dir on a shared filesystem:
+#   python shard_pipeline.py worker --work-dir /mnt/shared/shard_work
+TASK_STATES = ["pending", "claimed", "done", "failed"]
+CLAIM_SEPARATOR = "__"
+
+
+# ==============================
+# FILE HELPERS
+# ==============================
+def task_dir(work_dir, state):
+    return os.path.join(work_dir, "tasks", state)
+
+
+def data_path(work_dir, *parts):
+    return os.path.join(work_dir, "data", *parts)
+
+
+def tmp_dir(work_dir):
+    return os.path.join(work_dir, "tmp")
+
+
+def write_json(path, data, temp_dir=None):
+    # temp_dir keeps partial files out of directories that workers scan;
+    # it must be on the same filesystem so the final rename stays atomic
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if temp_dir is None:
+        tmp_path = path + ".tmp"
+    else:
+        os.makedirs(temp_dir, exist_ok=True)
+        tmp_path = os.path.join(temp_dir, f"{socket.gethostname()}-{os.getpid()}-{os.path.basename(path)}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def write_task(work_dir, state, name, task):
+    write_json(os.path.join(task_dir(work_dir, state), name), task, tmp_dir(work_dir))
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def prepare_work_dir(work_dir):
+    for state in TASK_STATES:
+        os.makedirs(task_dir(work_dir, state), exist_ok=True)
+        for name in os.listdir(task_dir(work_dir, state)):
+            os.remove(os.path.join(task_dir(work_dir, state), name))
+    os.makedirs(data_path(work_dir), exist_ok=True)
+    os.makedirs(tmp_dir(work_dir), exist_ok=True)
+
+    stop_file = os.path.join(work_dir, "STOP")
+    if os.path.exists(stop_file):
+        os.remove(stop_file)
+
+
+# ==============================
+# TASK HANDLERS (RUN ON WORKERS)
+# ==============================
+def run_extract_task(work_dir, task):
+    from main import load_doc, extract_paragraph_text, extract_table_text, combine_text, extract_requirements
+
+    doc = load_doc(task["docx"])
+    blocks = combine_text(extract_paragraph_text(doc), extract_table_text(doc))
+    write_json(data_path(work_dir, task["output"]), extract_requirements(blocks))
+
+
+def run_map_task(work_dir, task):
+    import numpy as np
+    from detect_ambiguity import analyze_requirements
+    from embedding_model import get_embeddings
+
+    shard = read_json(data_path(work_dir, task["input"]))
+
+    ambiguous_results, _ = analyze_requirements(shard)
+    write_json(data_path(work_dir, task["ambiguity_output"]), ambiguous_results)
+
+    texts = [req["text"].strip() for req in shard]
+    embeddings = get_embeddings(texts) if texts else np.zeros((0, 0), dtype=np.float32)
+    np.save(data_path(work_dir, task["embedding_output"]), np.asarray(embeddings, dtype=np.float32))
+
+
+def run_block_task(work_dir, task):
+    import numpy as np
+    from detect_duplicates import normalize, tiled_similarity
+
+    left = normalize(np.load(data_path(work_dir, task["left"])))
+    right = normalize(np.load(data_path(work_dir, task["right"])))
+
+    pairs, edges = [], []
+    if len(left) and len(right):
+        # Off-diagonal blocks are computed once, so they supply top-k
+        # candidates for the right shard too
+        pairs, edges = tiled_similarity(
+            left, right, task["left_offset"], task["right_offset"], task["threshold"],
+            top_k=task["top_k"], both_directions=task["left"] != task["right"]
+        )
+    write_json(data_path(work_dir, task["output"]), pairs)
+
+    rows = np.concatenate([e[0] for e in edges]) if edges else np.zeros(0, dtype=np.int64)
+    cols = np.concatenate([e[1] for e in edges]) if edges else np.zeros(0, dtype=np.int64)
+    scores = np.concatenate([e[2] for e in edges]) if edges else np.zeros(0, dtype=np.float32)
+    np.savez(data_path(work_dir, task["edges_output"]), rows=rows, cols=cols, scores=scores)
+
+
+TASK_HANDLERS = {
+    "extract": run_extract_task,
+    "map": run_map_task,
+    "block": run_block_task,
+}
+
+
+# ==============================
+# WORKER LOOP
+# ==============================
+def claim_next_task(work_dir, worker_tag):
+    pending = task_dir(work_dir, "pending")
+
+    for name in sorted(os.listdir(pending)):
+        if not name.endswith(".json"):
+            continue
+        # The claim carries the worker tag, so a requeued task claimed again
+        # by another worker never shares a path with the stale claim
+        claimed_path = os.path.join(task_dir(work_dir, "claimed"), worker_tag + CLAIM_SEPARATOR + name)
+        try:
+            # rename is atomic, so exactly one worker wins each task
+            os.rename(os.path.join(pending, name), claimed_path)
+        except FileNotFoundError:
+            continue
+        os.utime(claimed_path)  # rename keeps the pending file's mtime
+        return name, claimed_path
+
+    return None, None
+
+
+def heartbeat(claimed_path, stop):
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            os.utime(claimed_path)
+        except FileNotFoundError:
+            return  # requeued by the coordinator
+
+
+def remove_claim(claimed_path):
+    try:
+        os.remove(claimed_path)
+    except FileNotFoundError:
+        pass
+
+
+def run_worker(work_dir):
+    worker_name = f"{socket.gethostname()}:{os.getpid()}"
+    worker_tag = f"{socket.gethostname()}-{os.getpid()}"
+    print(f"🟢 Worker {worker_name} started on {work_dir}")
+
+    while True:
+        name, claimed_path = claim_next_task(work_dir, worker_tag)
+
+        if name is None:
+            if os.path.exists(os.path.join(work_dir, "STOP")):
+                break
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        print(f"🔄 [{worker_name}] {name}")
+
+        stop = threading.Event()
+        threading.Thread(target=heartbeat, args=(claimed_path, stop), daemon=True).start()
+
+        task = {}
+        try:
+            task = read_json(claimed_path)
+            TASK_HANDLERS[task["type"]](work_dir, task)
+        except Exception as e:
+            print(f"❌ [{worker_name}] {name} failed: {e}")
+            task["error"] = f"{type(e).__name__}: {e}"
+            task["worker"] = worker_name
+            write_task(work_dir, "failed", name, task)
+        else:
+            task["worker"] = worker_name
+            write_task(work_dir, "done", name, task)
+        finally:
+            stop.set()
+            remove_claim(claimed_path)
+
+    print(f"✅ Worker {worker_name} stopped")
+
+
+# ==============================
+# COORDINATOR
+# ==============================
+def submit_tasks(work_dir, phase, tasks):
+    names = []
+    for i, task in enumerate(tasks):
+        name = f"{phase}_{i:05d}.json"
+        write_task(work_dir, "pending", name, task)
+        names.append(name)
+    return names
+
+
+def requeue_stale_claims(work_dir):
+    """
+    Return tasks whose worker stopped heartbeating (killed, OOM, host
+    lost) to pending, or fail them after MAX_ATTEMPTS lost claims.
+    """
+    claimed = task_dir(work_dir, "claimed")
+    now = time.time()
+
+    for claim in os.listdir(claimed):
+        path = os.path.join(claimed, claim)
+        try:
+            if now - os.path.getmtime(path) < CLAIM_TIMEOUT:
+                continue
+            task = read_json(path)
+        except FileNotFoundError:
+            continue  # finished meanwhile
+
+        worker_tag, name = claim.split(CLAIM_SEPARATOR, 1)
+        task["attempts"] = task.get("attempts", 0) + 1
+
+        if task["attempts"] >= MAX_ATTEMPTS:
+            task["error"] = f"worker {worker_tag} stopped responding ({task['attempts']} lost claims)"
+            write_task(work_dir, "failed", name, task)
+        else:
+            print(f"⚠️ {name}: no heartbeat from {worker_tag} for {CLAIM_TIMEOUT}s, requeueing")
+            write_task(work_dir, "pending", name, task)
+        remove_claim(path)
+
+
+def wait_for_tasks(work_dir, names, workers):
+    remaining = set(names)
+
+    while remaining:
+        requeue_stale_claims(work_dir)
+
+        failed = [n for n in remaining if os.path.exists(os.path.join(task_dir(work_dir, "failed"), n))]
+        if failed:
+            error = read_json(os.path.join(task_dir(work_dir, "failed"), failed[0]))["error"]
+            raise RuntimeError(f"Task {failed[0]} failed: {error}")
+
+        remaining = {n for n in remaining if not os.path.exists(os.path.join(task_dir(work_dir, "done"), n))}
+
+        if remaining and workers and all(proc.poll() is not None for proc in workers):
+            raise RuntimeError("All local workers exited before the tasks finished")
+
+        if remaining:
+            time.sleep(POLL_INTERVAL)
+
+
+def run_phase(work_dir, phase, tasks, workers):
+    print(f"\n🚀 Phase '{phase}': {len(tasks)} task(s)")
+    names = submit_tasks(work_dir, phase, tasks)
+    wait_for_tasks(work_dir, names, workers)
+    print(f"✅ Phase '{phase}' finished")
+
+
+def start_local_workers(work_dir, count):
+    workers = []
+    for _ in range(count):
+        workers.append(subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "worker", "--work-dir", work_dir]
+        ))
+    return workers
+
+
+def stop_workers(work_dir, workers):
+    with open(os.path.join(work_dir, "STOP"), "w", encoding="utf-8") as f:
+        f.write("stop\n")
+    for proc in workers:
+        proc.wait()
+
+
+def partition(requirements, num_shards):
+    """
+    Split into contiguous shards so that concatenating shard results in
+    shard order reproduces the single-node order exactly.
+    """
+    num_shards = max(1, min(num_shards, len(requirements)))
+    size, extra = divmod(len(requirements), num_shards)
+
+    shards = []
+    start = 0
+    for k in range(num_shards):
+        end = start + size + (1 if k < extra else 0)
+        shards.append((start, requirements[start:end]))
+        start = end
+
+    return shards
+
+
+def extract_specs(work_dir, docx_paths, workers):
+    tasks = [
+        {"type": "extract", "docx": os.path.abspath(path), "output": f"extract_{i:05d}.json"}
+        for i, path in enumerate(docx_paths)
+    ]
+    run_phase(work_dir, "extract", tasks, workers)
+
+    # Merge in input order; a later spec overrides a repeated ID, like a single dict would
+    requirements = {}
+    for task in tasks:
+        requirements.update(read_json(data_path(work_dir, task["output"])))
+
+    with open("requirements.json", "w", encoding="utf-8") as f:
+        json.dump(requirements, f, indent=4, ensure_ascii=False)
+    print(f"🟤 Saved {len(requirements)} requirements to requirements.json")
+
+
+def run_coordinator(work_dir, num_shards, num_workers, threshold, docx_paths):
+    from detect_ambiguity import load_requirements
+    import numpy as np
+    from ambiguity_classifier import add_learned_scores
+    from detect_duplicates import (TOP_K, build_report, build_similarity_graph, group_duplicates,
+                                   save_embedding_cache, save_report, save_similarity_graph)
+
+    prepare_work_dir(work_dir)
+    workers = start_local_workers(work_dir, num_workers)
+    print(f"🟢 Started {len(workers)} local worker(s)")
+
+    try:
+        if docx_paths:
+            extract_specs(work_dir, docx_paths, workers)
+
+        requirements = load_requirements()
+        print(f"🔢 Total requirements: {len(requirements)}")
+
+        shards = partition(requirements, num_shards)
+
+        # ---------- MAP: ambiguity + embeddings per shard ----------
+        map_tasks = []
+        for k, (offset, shard) in enumerate(shards):
+            write_json(data_path(work_dir, f"shard_{k:05d}.json"), shard)
+            map_tasks.append({
+                "type": "map",
+                "shard": k,
+                "input": f"shard_{k:05d}.json",
+                "ambiguity_output": f"ambiguity_{k:05d}.json",
+                "embedding_output": f"embeddings_{k:05d}.npy",
+            })
+        run_phase(work_dir, "map", map_tasks, workers)
+
+        # ---------- BLOCKS: similarity for every shard pair ----------
+        block_tasks = []
+        for a, (offset_a, _) in enumerate(shards):
+            for b in range(a, len(shards)):
+                block_tasks.append({
+                    "type": "block",
+                    "left": f"embeddings_{a:05d}.npy",
+                    "right": f"embeddings_{b:05d}.npy",
+                    "left_offset": offset_a,
+                    "right_offset": shards[b][0],
+                    "threshold": threshold,
+                    "top_k": TOP_K,
+                    "output": f"pairs_{a:05d}_{b:05d}.json",
+                    "edges_output": f"edges_{a:05d}_{b:05d}.npz",
+                })
+        run_phase(work_dir, "block", block_tasks, workers)
+    finally:
+        stop_workers(work_dir, workers)
+
+    # ---------- REDUCE ----------
+    print("\n🔎 Merging shard results...")
+
+    ambiguous_results = []
+    for task in map_tasks:
+        ambiguous_results.extend(read_json(data_path(work_dir, task["ambiguity_output"])))
+
+    pairs = []
+    edges = []
+    for task in block_tasks:
+        pairs.extend(tuple(p) for p in read_json(data_path(work_dir, task["output"])))
+        data = np.load(data_path(work_dir, task["edges_output"]))
+        edges.append((data["rows"], data["cols"], data["scores"]))
+
+    embeddings = [np.load(data_path(work_dir, task["embedding_output"])) for task in map_tasks]
+    save_embedding_cache([req["id"] for req in requirements], [req["text"] for req in requirements],
+                         np.vstack(embeddings))
+    save_similarity_graph(build_similarity_graph([req["id"] for req in requirements], edges))
+    ambiguous_results = add_learned_scores(ambiguous_results, requirements)
+
+    dedup_requirements = [{"id": req["id"], "text": req["text"].strip()} for req in requirements]
+    duplicate_groups = group_duplicates(len(dedup_requirements), pairs)
+    save_report(build_report(dedup_requirements, duplicate_groups, threshold))
+
+    with open("ambiguity_report.json", "w", encoding="utf-8") as f:
+        json.dump(ambiguous_results, f, indent=4)
+
+    print(f"✅ Duplicate groups found: {len(duplicate_groups)}")
+    print(f"✅ Ambiguous requirements: {len(ambiguous_results)}")
+    print("📁 duplicate_report.json, ambiguity_report.json and similarity_graph.npz generated")
+
+
+# ==============================
+# MAIN
+# ==============================
+if __name__ == "__main__":
+    from detect_duplicates import SIMILARITY_THRESHOLD
+
+    parser = argparse.ArgumentParser(description="Sharded SRS analysis with file-based coordination")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Coordinate a sharded run")
+    run_parser.add_argument("--work-dir", default=WORK_DIR)
+    run_parser.add_argument("--shards", type=int, default=4)
+    run_parser.add_argument("--workers", type=int, default=None,
+                            help=f"Local worker processes (default: min(shards, {DEFAULT_LOCAL_WORKERS}); "
+                                 "0 = external workers only)")
+    run_parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD)
+    run_parser.add_argument("--docx", nargs="*", default=[],
+                            help="Spec documents to extract first (one extract task each)")
+
+    worker_parser = sub.add_parser("worker", help="Process tasks from a work dir")
+    worker_parser.add_argument("--work-dir", default=WORK_DIR)
+
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        run_worker(args.work_dir)
+    else:
+        if args.workers is None:
+            args.workers = max(1, min(args.shards, DEFAULT_LOCAL_WORKERS))
+        run_coordinator(args.work_dir, args.shards, args.workers, args.threshold, args.docx)
@@ -0,0 +1,146 @@
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+from detect_duplicates import GRAPH_FILE, SIMILARITY_THRESHOLD
+
+
+# ==============================
+# QUERY API
+# ==============================
+class SimilarityGraph:
+    """
+    Read-only view of the top-k neighbour graph written by the duplicate
+    stage. Needs only NumPy; the arrays are turned into Python lists on
+    load so each lookup is a list slice rather than a NumPy call.
+    """
+
+    def __init__(self, ids, indptr, indices, scores):
+        self.ids = list(ids)
+        self.row_of = {req_id: row for row, req_id in enumerate(self.ids)}
+        self.indptr = list(indptr)
+        self.indices = list(indices)
+        self.scores = list(scores)
+
+    @classmethod
+    def load(cls, path=GRAPH_FILE):
+        data = np.load(path)
+        return cls(
+            data["ids"].tolist(),
+            data["indptr"].tolist(),
+            data["indices"].tolist(),
+            data["scores"].astype(float).tolist(),
+        )
+
+    def _row(self, req_id):
+        if req_id not in self.row_of:
+            raise KeyError(f"Unknown requirement ID: {req_id}")
+        return self.row_of[req_id]
+
+    def _edges(self, row, min_score):
+        # Rows are stored best-first, so stop at the first weaker edge
+        for pos in range(self.indptr[row], self.indptr[row + 1]):
+            if self.scores[pos] < min_score:
+                break
+            yield self.indices[pos], self.scores[pos]
+
+    def neighbors(self, req_id, k=None, min_score=-1.0):
+        """
+        [(id, score)] most similar first.
+        """
+        result = []
+        for col, score in self._edges(self._row(req_id), min_score):
+            if k is not None and len(result) >= k:
+                break
+            result.append((self.ids[col], score))
+        return result
+
+    def path(self, source, target, min_score=SIMILARITY_THRESHOLD):
+        """
+        Fewest-hop chain of IDs from source to target using only edges
+        with score >= min_score, or None if they are not connected.
+        """
+        start, goal = self._row(source), self._row(target)
+        previous = {start: None}
+        frontier = deque([start])
+
+        while frontier:
+            row = frontier.popleft()
+            if row == goal:
+                chain = []
+                while row is not None:
+                    chain.append(self.ids[row])
+                    row = previous[row]
+                return chain[::-1]
+
+            for col, _ in self._edges(row, min_score):
+                if col not in previous:
+                    previous[col] = row
+                    frontier.append(col)
+
+        return None
+
+    def cluster(self, req_id, min_score=SIMILARITY_THRESHOLD):
+        """
+        IDs connected to req_id through edges with score >= min_score,
+        in requirement order.
+        """
+        start = self._row(req_id)
+        seen = {start}
+        frontier = [start]
+
+        while frontier:
+            row = frontier.pop()
+            for col, _ in self._edges(row, min_score):
+                if col not in seen:
+                    seen.add(col)
+                    frontier.append(col)
+
+        return [self.ids[row] for row in sorted(seen)]
+
+
+# ==============================
+# CLI
+# ==============================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the requirement similarity graph")
+    parser.add_argument("--graph", default=GRAPH_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    neighbors_parser = sub.add_parser("neighbors", help="Most similar requirements")
+    neighbors_parser.add_argument("id")
+    neighbors_parser.add_argument("-k", type=int, default=5)
+    neighbors_parser.add_argument("--min-score", type=float, default=-1.0)
+
+    path_parser = sub.add_parser("path", help="Similarity chain between two requirements")
+    path_parser.add_argument("source")
+    path_parser.add_argument("target")
+    path_parser.add_argument("--min-score", type=float, default=SIMILARITY_THRESHOLD)
+
+    cluster_parser = sub.add_parser("cluster", help="Requirements connected to one requirement")
+    cluster_parser.add_argument("id")
+    cluster_parser.add_argument("--min-score", type=float, default=SIMILARITY_THRESHOLD)
+
+    args = parser.parse_args()
+    graph = SimilarityGraph.load(args.graph)
+
+    start = time.perf_counter()
+    if args.command == "neighbors":
+        result = graph.neighbors(args.id, args.k, args.min_score)
+    elif args.command == "path":
+        result = graph.path(args.source, args.target, args.min_score)
+    else:
+        result = graph.cluster(args.id, args.min_score)
+    elapsed = (time.perf_counter() - start) * 1e6
+
+    if args.command == "neighbors":
+        for req_id, score in result:
+            print(f"{req_id}\t{score:.3f}")
+    elif args.command == "path":
+        print(" → ".join(result) if result else f"❌ No path at score >= {args.min_score}")
+    else:
+        print(", ".join(result))
+
+    print(f"⏱️ {elapsed:.0f} µs")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+import argparse
+import importlib
+import subprocess
+import sys
+
+# ==============================
+# SUBCOMMANDS
+# ==============================
+# Stage modules per subcommand, in run order. Each module exposes main()
+# and keeps torch / sentence-transformers / python-docx / openai imports
+# inside the functions that need them.
+STAGES = {
+    "extract": ["main"],
+    "dedup": ["detect_duplicates"],
+    "ambiguity": ["detect_ambiguity"],
+    "constraints": ["extract_constraints"],
+    "annotate": ["annotate_srs"],
+    "rewrite": ["rewrite_ambiguous"],
+}
+STAGES["all"] = [module for name in STAGES for module in STAGES[name]]
+STAGES["triage"] = ["triage"]
+
+# Stages whose main() takes the input document
+DOCX_STAGES = ["main", "triage"]
+
+HELP = {
+    "extract": "Extract requirements from SRS.docx into requirements.json",
+    "dedup": "Detect duplicate requirements (loads the MPNet model)",
+    "ambiguity": "Run the ambiguity rules (and learned scores if trained)",
+    "constraints": "Extract quantitative constraints and find conflicts",
+    "annotate": "Write annotated_srs.json and annotated_srs.docx",
+    "rewrite": "Rewrite ambiguous requirements (rule fast path + local LLM)",
+    "all": "Run every stage in order",
+    "triage": "Rules now, sampled duplicate estimate refined in the background",
+}
+
+# Libraries whose import alone costs seconds
+HEAVY_MODULES = ["torch", "sentence_transformers", "spacy", "docx", "openai", "numpy"]
+
+
+def run_stages(name, docx_path):
+    for module_name in STAGES[name]:
+        print(f"\n🚀 Running {module_name}...\n")
+        module = importlib.import_module(module_name)
+        if module_name in DOCX_STAGES:
+            module.main(docx_path)
+        else:
+            module.main()
+
+
+# ==============================
+# IMPORT-TIME REPORT
+# ==============================
+IMPORT_PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {heavy!r} if m in sys.modules]]))
+"""
+
+
+def import_report():
+    """
+    Import each subcommand's modules in a fresh interpreter, so every row
+    shows the real cold-start cost and which heavy libraries it pulled in.
+    """
+    import json
+
+    print(f"{'subcommand':<12} {'import time':>12}   heavy libraries loaded at import")
+    for name, modules in STAGES.items():
+        probe = IMPORT_PROBE.format(modules=modules, heavy=HEAVY_MODULES)
+        result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True)
+
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+            print(f"{name:<12} {'-':>12}   ❌ {error}")
+            continue
+
+        elapsed, heavy = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{name:<12} {elapsed * 1000:>9.1f} ms   {', '.join(heavy) or 'none'}")
+
+
+# ==============================
+# MAIN
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="srs-analyze", description="SRS analyzer pipeline")
+    parser.add_argument("--import-report", action="store_true",
+                        help="Show per-subcommand startup cost and exit")
+    sub = parser.add_subparsers(dest="command")
+
+    for name in STAGES:
+        stage_parser = sub.add_parser(name, help=HELP[name])
+        if any(module in DOCX_STAGES for module in STAGES[name]):
+            stage_parser.add_argument("docx", nargs="?", default="SRS.docx")
+
+    args = parser.parse_args(argv)
+
+    if args.import_report:
+        import_report()
+        return
+    if not args.command:
+        parser.print_help()
+        return
+
+    run_stages(args.command, getattr(args, "docx", "SRS.docx"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import argparse
+import json
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+# ==============================
+# SETTINGS
+# ==============================
+QUEUE_SIZE = 64          # bounded queues: extraction blocks when a consumer falls behind
+EMBED_MICRO_BATCH = 32   # max requirements per encode call
+POLL_TIMEOUT = 0.1
+
+END = object()           # end-of-stream marker
+
+
+class StageAborted(Exception):
+    pass
+
+
+# ==============================
+# QUEUE HELPERS
+# ==============================
+def put(q, item, abort):
+    while True:
+        try:
+            q.put(item, timeout=POLL_TIMEOUT)
+            return
+        except queue.Full:
+            if abort.is_set():
+                raise StageAborted()
+
+
+def get(q, abort):
+    while True:
+        try:
+            return q.get(timeout=POLL_TIMEOUT)
+        except queue.Empty:
+            if abort.is_set():
+                raise StageAborted()
+
+
+def start_stage(name, target, state, *args):
+    def run():
+        try:
+            target(state, *args)
+        except StageAborted:
+            pass
+        except BaseException as e:
+            print(f"❌ Stage '{name}' failed: {e}")
+            state["errors"].append(e)
+            state["abort"].set()
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+# ==============================
+# STAGES
+# ==============================
+def extract_stage(state, docx_path, consumers):
+    from main import iter_requirements, iter_text_blocks, load_doc
+
+    doc = load_doc(docx_path)
+
+    for seq, (req_id, text) in enumerate(iter_requirements(iter_text_blocks(doc))):
+        with state["lock"]:
+            state["first_seen"].setdefault(req_id, len(state["first_seen"]))
+            state["latest"][req_id] = (seq, text)
+
+        if text is not None:
+            for q in consumers:
+                put(q, (seq, req_id, text), state["abort"])
+
+    for q in consumers:
+        put(q, END, state["abort"])
+
+    print(f"🟣 Extraction finished: {len(state['first_seen'])} IDs streamed")
+
+
+def ambiguity_stage(state, in_q, rewrite_q):
+    from detect_ambiguity import detect_ambiguity
+
+    while True:
+        item = get(in_q, state["abort"])
+        if item is END:
+            break
+
+        seq, req_id, text = item
+        flags, score = detect_ambiguity(text)
+        if not flags:
+            continue
+
+        result = {
+            "id": req_id,
+            "text": text,
+            "ambiguous_flags": flags,
+            "ambiguity_score": score
+        }
+        state["ambiguity"][seq] = result
+
+        if rewrite_q is not None:
+            put(rewrite_q, (seq, result), state["abort"])
+
+    print("🟢 Ambiguity detection finished")
+
+
+def embedding_stage(state, in_q):
+    from embedding_model import get_embeddings
+
+    done = False
+    while not done:
+        # Block for the first item, then take whatever else is already queued
+        batch = [get(in_q, state["abort"])]
+        while len(batch) < EMBED_MICRO_BATCH:
+            try:
+                batch.append(in_q.get_nowait())
+            except queue.Empty:
+                break
+
+        if batch[-1] is END:
+            batch.pop()
+            done = True
+        if not batch:
+            continue
+
+        vectors = get_embeddings([text.strip() for _, _, text in batch])
+        for (seq, _, _), vector in zip(batch, vectors):
+            state["embeddings"][seq] = vector
+
+    print(f"🧠 Embedding finished: {len(state['embeddings'])} requirement(s)")
+
+
+def rewrite_stage(state, in_q):
+    from rewrite_ambiguous import BATCH_SIZE, parse_output, rewrite_batch, rule_rewrite
+
+    pending = []
+
+    def flush():
+        items = [item for _, item in pending]
+        parsed = parse_output(rewrite_batch(items), items)
+        for seq, item in pending:
+            state["rewrites"][seq] = (parsed[item["id"]], "llm")
+        state["llm_calls"] += 1
+        pending.clear()
+
+    while True:
+        entry = get(in_q, state["abort"])
+        if entry is END:
+            break
+
+        seq, item = entry
+        rewritten = rule_rewrite(item)
+        if rewritten is not None:
+            state["rewrites"][seq] = (rewritten, "rule")
+            continue
+
+        pending.append((seq, item))
+        if len(pending) == BATCH_SIZE:
+            flush()
+
+    if pending:
+        flush()
+
+    print(f"✍️ Rewriting finished ({state['llm_calls']} LLM call(s))")
+
+
+# ==============================
+# ORDERED OUTPUTS
+# ==============================
+def final_sequence(state):
+    """
+    (req_id, seq) in the order extract_requirements would produce:
+    first-seen position, latest valid text.
+    """
+    final = []
+    for req_id in sorted(state["first_seen"], key=state["first_seen"].get):
+        seq, text = state["latest"][req_id]
+        if text is not None:
+            final.append((req_id, seq))
+    return final
+
+
+def write_json(path, data, ensure_ascii=False):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=ensure_ascii)
+
+
+def run_report_scripts():
+    for script in ["extract_constraints.py", "annotate_srs.py"]:
+        result = subprocess.run([sys.executable, script], text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{script} failed")
+
+
+def finalize_analysis(state, rewrite_q):
+    """
+    Write requirements, duplicate and ambiguity reports once extraction,
+    ambiguity and embedding have drained. Returns the final ambiguity list
+    and the latest sequence number of every requirement ID.
+    """
+    import numpy as np
+    from ambiguity_classifier import add_learned_scores
+    from detect_duplicates import (build_report, build_similarity_graph, find_similarity, group_duplicates,
+                                   save_embedding_cache, save_report, save_similarity_graph)
+
+    final = final_sequence(state)
+    requirements = {req_id: state["latest"][req_id][1] for req_id, _ in final}
+    write_json("requirements.json", requirements)
+
+    dedup_requirements = [{"id": req_id, "text": text.strip()} for req_id, text in requirements.items()]
+    embeddings = np.array([state["embeddings"][seq] for _, seq in final], dtype=np.float32)
+    save_embedding_cache(list(requirements), list(requirements.values()), embeddings)
+
+    pairs, edges = find_similarity(embeddings) if len(embeddings) else ([], [])
+    save_similarity_graph(build_similarity_graph(list(requirements), edges))
+    duplicate_groups = group_duplicates(len(dedup_requirements), pairs)
+    save_report(build_report(dedup_requirements, duplicate_groups))
+    print(f"✅ Duplicate groups found: {len(duplicate_groups)}")
+
+    ambiguous_results = [state["ambiguity"][seq] for _, seq in final if seq in state["ambiguity"]]
+    reported = {item["id"] for item in ambiguous_results}
+
+    requirement_list = [{"id": req_id, "text": text} for req_id, text in requirements.items()]
+    ambiguous_results = add_learned_scores(ambiguous_results, requirement_list)
+    write_json("ambiguity_report.json", ambiguous_results, ensure_ascii=True)
+    print(f"✅ Ambiguous requirements: {len(ambiguous_results)}")
+
+    # Items only the classifier flagged were never queued for rewriting
+    if rewrite_q is not None:
+        latest_seq = dict(final)
+        for item in ambiguous_results:
+            if item["id"] not in reported:
+                put(rewrite_q, (latest_seq[item["id"]], item), state["abort"])
+
+    return ambiguous_results, dict(final)
+
+
+def write_rewrites(state, ambiguous_results, latest_seq):
+    from rewrite_ambiguous import BATCH_SIZE
+
+    output = []
+    for item in ambiguous_results:
+        text, method = state["rewrites"][latest_seq[item["id"]]]
+        output.append({"id": item["id"], "original": item["text"], "rewritten": text, "method": method})
+
+    rule_count = sum(1 for item in output if item["method"] == "rule")
+    summary = {
+        "total_items": len(output),
+        "rule_rewrites": rule_count,
+        "llm_rewrites": len(output) - rule_count,
+        "llm_calls": state["llm_calls"],
+        "llm_calls_avoided": max((len(output) + BATCH_SIZE - 1) // BATCH_SIZE - state["llm_calls"], 0)
+    }
+
+    write_json("rewritten_ambiguity.json", output)
+    write_json("rewrite_summary.json", summary)
+    print(f"📄 Saved rewritten_ambiguity.json (LLM calls avoided: {summary['llm_calls_avoided']})")
+
+
+# ==============================
+# MAIN PIPELINE
+# ==============================
+def run_streaming(docx_path, skip_rewrite=False):
+    start = time.perf_counter()
+
+    state = {
+        "lock": threading.Lock(),
+        "abort": threading.Event(),
+        "errors": [],
+        "first_seen": {},
+        "latest": {},
+        "ambiguity": {},
+        "embeddings": {},
+        "rewrites": {},
+        "llm_calls": 0,
+    }
+
+    ambiguity_q = queue.Queue(maxsize=QUEUE_SIZE)
+    embed_q = queue.Queue(maxsize=QUEUE_SIZE)
+    rewrite_q = None if skip_rewrite else queue.Queue(maxsize=QUEUE_SIZE)
+
+    analysis = [
+        start_stage("extract", extract_stage, state, docx_path, [ambiguity_q, embed_q]),
+        start_stage("ambiguity", ambiguity_stage, state, ambiguity_q, rewrite_q),
+        start_stage("embedding", embedding_stage, state, embed_q),
+    ]
+    rewriter = None if skip_rewrite else start_stage("rewrite", rewrite_stage, state, rewrite_q)
+
+    try:
+        for thread in analysis:
+            thread.join()
+        if state["errors"]:
+            raise state["errors"][0]
+
+        ambiguous_results, latest_seq = finalize_analysis(state, rewrite_q)
+        print(f"⏱️ Analysis outputs ready after {time.perf_counter() - start:.1f}s")
+
+        # Reports only need the analysis outputs, so they run while rewriting drains
+        reports = start_stage("reports", lambda _: run_report_scripts(), state)
+
+        if rewriter is not None:
+            put(rewrite_q, END, state["abort"])
+            rewriter.join()
+
+        reports.join()
+        if state["errors"]:
+            raise state["errors"][0]
+
+        if rewriter is not None:
+            write_rewrites(state, ambiguous_results, latest_seq)
+    finally:
+        state["abort"].set()
+
+    print(f"\n🎉 Streaming pipeline finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the SRS pipeline with streaming between stages")
+    parser.add_argument("docx", nargs="?", default="SRS.docx")
+    parser.add_argument("--skip-rewrite", action="store_true", help="Do not call the rewrite stage")
+    args = parser.parse_args()
+
+    run_streaming(args.docx, args.skip_rewrite)
@@ -0,0 +1,98 @@
+from extract_constraints import build_index, find_conflicts, parse_constraints
+
+
+def constraints_for(requirements):
+    constraints = []
+    for req_id, text in requirements.items():
+        constraints.extend(parse_constraints(req_id, text))
+    return constraints
+
+
+def conflict_pairs(requirements):
+    conflicts = find_conflicts(build_index(constraints_for(requirements)))
+    return {(c["type"], c["req1"], c["req2"]) for c in conflicts}
+
+
+def test_units_are_normalized():
+    [constraint] = parse_constraints("NFR-01", "Page load times of less than 3 seconds.")
+    assert (constraint["metric"], constraint["comparator"], constraint["value"], constraint["unit"]) == (
+        "load_time", "<", 3.0, "s"
+    )
+
+    [constraint] = parse_constraints("NFR-63", "Recovery Point Objective (RPO) of 1 hour.")
+    assert (constraint["comparator"], constraint["value"]) == ("<=", 3600.0)
+
+
+def test_range_bounds_use_their_own_units():
+    [constraint] = parse_constraints("NFR-90", "Response time between 500 ms and 2 seconds.")
+    assert constraint["value"] == [0.5, 2.0]
+
+    [constraint] = parse_constraints("NFR-91", "Response time between 5 and 2 seconds.")
+    assert constraint["value"] == [2.0, 5.0]
+
+
+def test_scope_per_clause():
+    constraints = parse_constraints(
+        "NFR-62", "Recovery Time Objective (RTO) of 4 hours for critical functions and "
+                  "24 hours for non-critical functions."
+    )
+    assert [(c["scope"], c["value"]) for c in constraints] == [("critical", 14400.0), ("non_critical", 86400.0)]
+
+
+def test_standard_operations_are_not_a_scope():
+    [constraint] = parse_constraints("NFR-02", "Search results within 2 seconds for standard search queries.")
+    assert constraint["scope"] == ""
+
+
+def test_unit_only_durations_are_not_compared():
+    assert conflict_pairs({
+        "NFR-02": "Search results within 2 seconds for standard search queries.",
+        "NFR-04": "Batch operations not exceeding 2 minutes for standard operations.",
+    }) == set()
+
+
+def test_every_contradiction_is_reported():
+    # Nested limits are only compared with the loosest earlier one, so A/D is not listed
+    assert conflict_pairs({
+        "A": "Response time of at most 2 seconds.",
+        "B": "Response time of at least 5 seconds.",
+        "C": "Response time of less than 10 seconds.",
+        "D": "Response time under 1 second.",
+    }) == {
+        ("contradictory", "A", "B"),
+        ("contradictory", "D", "B"),
+        ("overlapping", "C", "B"),
+        ("subsumed", "C", "A"),
+        ("subsumed", "C", "D"),
+    }
+
+
+def test_touching_closed_bounds_do_not_contradict():
+    assert conflict_pairs({
+        "A": "Response time of at most 2 seconds.",
+        "B": "Response time between 2 and 5 seconds.",
+        "C": "Response time of less than 2 seconds.",
+    }) == {("subsumed", "A", "C"), ("overlapping", "A", "B"), ("contradictory", "C", "B")}
+
+
+def test_duplicates_and_different_scopes():
+    assert conflict_pairs({
+        "X": "CPU usage of no more than 80% during normal operations.",
+        "Y": "CPU utilization no more than 80% during normal operations.",
+        "Z": "CPU utilization no more than 95% during peak periods.",
+    }) == {("duplicate", "X", "Y")}
+
+
+def test_metric_comes_from_the_values_own_clause():
+    requirements = {
+        "NFR-1": "The system SHALL respond within 2 seconds response time with at least 99.9% availability.",
+        "NFR-2": "The system SHALL keep response time under 2 seconds and CPU usage below 70%.",
+    }
+    constraints = constraints_for(requirements)
+    assert [(c["id"], c["metric"], c["value"]) for c in constraints] == [
+        ("NFR-1", "response_time", 2.0),
+        ("NFR-1", "availability", 0.999),
+        ("NFR-2", "response_time", 2.0),
+        ("NFR-2", "cpu_utilization", 0.7),
+    ]
+    assert not any(kind == "contradictory" for kind, _, _ in conflict_pairs(requirements))
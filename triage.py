@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# ==============================
+# SETTINGS
+# ==============================
+FIRST_SAMPLE = 128        # requirements embedded before the first estimate
+BOOTSTRAP_ROUNDS = 200
+CONFIDENCE = 0.95
+SEED = 7
+LOG_FILE = "triage.log"
+
+
+# ==============================
+# HELPERS
+# ==============================
+def write_json_atomic(path, data, ensure_ascii=False):
+    # Readers polling annotated_srs.json never see a half-written file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=ensure_ascii)
+    os.replace(tmp_path, path)
+
+
+# ==============================
+# STEP 1: STREAM + CHEAP RULES
+# ==============================
+def stream_rules(docx_path):
+    """
+    Stream extraction and run the ambiguity rules on each requirement as
+    it arrives. Returns (requirements, ambiguity results), both final.
+    """
+    from detect_ambiguity import detect_ambiguity
+    from main import iter_requirements, iter_text_blocks, load_doc
+
+    latest = {}   # first-seen order, latest text (None = withdrawn)
+    ambiguity = {}
+
+    for req_id, text in iter_requirements(iter_text_blocks(load_doc(docx_path))):
+        latest[req_id] = text
+        ambiguity.pop(req_id, None)
+
+        if text is not None:
+            flags, score = detect_ambiguity(text)
+            if flags:
+                ambiguity[req_id] = {"id": req_id, "text": text, "ambiguous_flags": flags, "ambiguity_score": score}
+
+    requirements = {req_id: text for req_id, text in latest.items() if text is not None}
+
+    # Same order as a full detect_ambiguity run
+    return requirements, [ambiguity[req_id] for req_id in requirements if req_id in ambiguity]
+
+
+def write_preliminary(docx_path):
+    from annotate_srs import build_annotated_report
+    from extract_constraints import analyze_constraints, save_report
+
+    start = time.perf_counter()
+    requirements, ambiguous_results = stream_rules(docx_path)
+
+    write_json_atomic("requirements.json", requirements)
+    write_json_atomic("ambiguity_report.json", ambiguous_results, ensure_ascii=True)
+    constraint_data = analyze_constraints(requirements)
+    save_report(constraint_data)
+
+    report = build_annotated_report(requirements, {"duplicates": []}, ambiguous_results, constraint_data)
+    report["summary"]["duplicate_groups"] = None
+    report["summary"]["duplicates_removed"] = None
+    report["triage"] = {
+        "status": "preliminary",
+        "sampled": 0,
+        "total": len(requirements),
+        "duplicate_estimate": None,
+    }
+    write_json_atomic("annotated_srs.json", report)
+
+    print(f"⚡ Preliminary annotated_srs.json written in {time.perf_counter() - start:.1f}s "
+          f"({len(requirements)} requirements, {len(ambiguous_results)} ambiguous)")
+
+
+# ==============================
+# STEP 2: SAMPLED DUPLICATE ESTIMATE
+# ==============================
+def estimate_duplicates(pairs, sample, total, rng):
+    """
+    Duplicate-pair rate among the sampled requirements, scaled to the
+    full set, with a bootstrap interval over sampled requirements.
+    Duplicates removed is approximated by the pair count (duplicate
+    pairs rarely chain).
+    """
+    import numpy as np
+
+    m = len(sample)
+    if m < 2:
+        return None
+
+    position = {idx: k for k, idx in enumerate(sample)}
+    left = np.array([position[i] for i, _, _ in pairs], dtype=np.int64)
+    right = np.array([position[j] for _, j, _ in pairs], dtype=np.int64)
+
+    all_pairs = total * (total - 1) / 2
+    rate = len(pairs) / (m * (m - 1) / 2)
+
+    # Resample requirements with replacement; a pair counts once per
+    # combination of its two members' draws
+    counts = rng.multinomial(m, np.full(m, 1.0 / m), size=BOOTSTRAP_ROUNDS).astype(np.float64)
+    hits = (counts[:, left] * counts[:, right]).sum(axis=1) if len(pairs) else np.zeros(BOOTSTRAP_ROUNDS)
+    distinct = (m * m - (counts ** 2).sum(axis=1)) / 2
+    rates = hits / np.maximum(distinct, 1)
+
+    tail = (1 - CONFIDENCE) / 2 * 100
+    low, high = np.percentile(rates, [tail, 100 - tail])
+    if m == total:
+        low = high = rate
+
+    def scaled(value):
+        return round(float(value * all_pairs), 1)
+
+    return {
+        "sampled_pairs": len(pairs),
+        "pair_rate": round(rate, 6),
+        "estimated_duplicate_pairs": scaled(rate),
+        "estimated_duplicate_pairs_ci": [scaled(low), scaled(high)],
+        "estimated_duplicate_rate": round(float(rate * all_pairs / total), 4),
+        "estimated_duplicate_rate_ci": [
+            round(float(low * all_pairs / total), 4),
+            round(float(high * all_pairs / total), 4),
+        ],
+        "confidence": CONFIDENCE,
+    }
+
+
+# ==============================
+# STEP 3: PROGRESSIVE REFINEMENT
+# ==============================
+def refine(seed=SEED):
+    """
+    Embed requirements in a random order, doubling the sample each
+    round, and rewrite annotated_srs.json after every round. The last
+    round covers everything and writes the same outputs as a full run.
+    """
+    import numpy as np
+    from ambiguity_classifier import add_learned_scores
+    from annotate_srs import build_annotated_report, generate_docx
+    from detect_duplicates import (TOP_K, build_report, build_similarity_graph, group_duplicates,
+                                   load_requirements, normalize, save_embedding_cache, save_report,
+                                   save_similarity_graph, tiled_similarity)
+    from embedding_model import get_embeddings
+
+    start = time.perf_counter()
+    requirements = load_requirements()
+    total = len(requirements)
+    if not total:
+        print("⚠️ No requirements to embed")
+        return
+
+    with open("ambiguity_report.json", "r", encoding="utf-8") as f:
+        ambiguous_results = json.load(f)
+    with open("constraint_report.json", "r", encoding="utf-8") as f:
+        constraint_data = json.load(f)
+    with open("requirements.json", "r", encoding="utf-8") as f:
+        raw_requirements = json.load(f)
+
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(total).tolist()
+
+    sample = []
+    unit = None
+    pairs = []
+    edges = []
+    size = min(FIRST_SAMPLE, total)
+
+    while len(sample) < total:
+        new = order[len(sample):size]
+        vectors = normalize(get_embeddings([requirements[i]["text"] for i in new]))
+
+        # Only the new blocks: old x new and new x new. Pairs come back as
+        # sample positions and are mapped to requirement indices.
+        offset = len(sample)
+        sample.extend(new)
+        block_pairs, block_edges = tiled_similarity(vectors, vectors, offset, offset, top_k=TOP_K)
+        if unit is not None:
+            old_pairs, old_edges = tiled_similarity(unit, vectors, 0, offset, top_k=TOP_K, both_directions=True)
+            block_pairs += old_pairs
+            block_edges += old_edges
+        unit = vectors if unit is None else np.vstack([unit, vectors])
+
+        for a, b, score in block_pairs:
+            i, j = sorted((sample[a], sample[b]))
+            pairs.append((i, j, score))
+
+        positions = np.array(sample)
+        edges.extend((positions[rows], positions[cols], scores) for rows, cols, scores in block_edges)
+
+        estimate = estimate_duplicates(pairs, sample, total, rng)
+        if len(sample) < total:
+            report = build_annotated_report(raw_requirements, {"duplicates": []}, ambiguous_results, constraint_data)
+            report["summary"]["duplicate_groups"] = None
+            report["summary"]["duplicates_removed"] = None
+            report["triage"] = {
+                "status": "refining",
+                "sampled": len(sample),
+                "total": total,
+                "elapsed_seconds": round(time.perf_counter() - start, 1),
+                "duplicate_estimate": estimate,
+            }
+            write_json_atomic("annotated_srs.json", report)
+
+            if estimate:
+                low, high = estimate["estimated_duplicate_rate_ci"]
+                print(f"🔁 {len(sample)}/{total} embedded: duplicate rate ≈ "
+                      f"{estimate['estimated_duplicate_rate']:.2%} ({low:.2%}–{high:.2%})")
+
+        size = min(size * 2, total)
+
+    # ---------- Complete: identical to a full pipeline run ----------
+    embeddings = np.empty_like(unit)
+    embeddings[sample] = unit
+    save_embedding_cache([req["id"] for req in requirements], [req["text"] for req in requirements], embeddings)
+    save_similarity_graph(build_similarity_graph([req["id"] for req in requirements], edges))
+
+    duplicate_report = build_report(requirements, group_duplicates(total, pairs))
+    save_report(duplicate_report)
+
+    ambiguous_results = add_learned_scores(ambiguous_results, [{"id": k, "text": v} for k, v in raw_requirements.items()])
+    write_json_atomic("ambiguity_report.json", ambiguous_results, ensure_ascii=True)
+
+    report = build_annotated_report(raw_requirements, duplicate_report, ambiguous_results, constraint_data)
+    report["triage"] = {
+        "status": "complete",
+        "sampled": total,
+        "total": total,
+        "elapsed_seconds": round(time.perf_counter() - start, 1),
+        "duplicate_estimate": estimate,
+    }
+    write_json_atomic("annotated_srs.json", report)
+    generate_docx(report)
+
+    print(f"✅ Triage complete after {time.perf_counter() - start:.1f}s: "
+          f"{duplicate_report['summary']['duplicate_groups']} duplicate groups")
+
+
+# ==============================
+# MAIN
+# ==============================
+def main(docx_path="SRS.docx", foreground=False, seed=SEED):
+    write_preliminary(docx_path)
+
+    if foreground:
+        refine(seed)
+        return
+
+    with open(LOG_FILE, "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--refine", "--seed", str(seed)],
+            stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+        )
+    print(f"🔁 Refining duplicate estimate in the background (PID {proc.pid}, log: {LOG_FILE})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fast first-look triage of an SRS document")
+    parser.add_argument("docx", nargs="?", default="SRS.docx")
+    parser.add_argument("--foreground", action="store_true", help="Refine in this process instead of the background")
+    parser.add_argument("--refine", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args()
+
+    if args.refine:
+        refine(args.seed)
+    else:
+        main(args.docx, args.foreground, args.seed)